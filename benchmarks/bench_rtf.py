@@ -0,0 +1,239 @@
+# 即時率（RTF）基準：以合成音訊跑與批次相同的 transcribe_file 路徑，
+# 比較各模型／裝置／解碼選項的載入時間、各階段耗時、RTF 與峰值記憶體，輸出 JSON 或 CSV；
+# --quantize both / --cpu-opt both 另外列出 int8 量化、CPU 最佳化相對一般 fp32 的加速倍數與文字差異比例
+#
+# 離線 / CI：--weights tiny（極小隨機模型）或 --weights random（與正式模型同尺寸的隨機權重，
+# 速度接近實際但解碼會跑到上限，屬最壞情況），兩者都不需下載模型
+import argparse
+import contextlib
+import csv
+import difflib
+import importlib.util
+import itertools
+import json
+import multiprocessing as mp
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "src" / "run_whisper_auto_1.8.py"
+SAMPLE_RATE = 16000
+
+# 與 whisper 官方權重相同的模型尺寸（random 權重用）
+MODEL_DIMS = {
+    "base": dict(n_audio_state=512, n_audio_head=8, n_audio_layer=6, n_text_state=512, n_text_head=8, n_text_layer=6),
+    "medium": dict(n_audio_state=1024, n_audio_head=16, n_audio_layer=24, n_text_state=1024, n_text_head=16, n_text_layer=24),
+    "large-v2": dict(n_audio_state=1280, n_audio_head=20, n_audio_layer=32, n_text_state=1280, n_text_head=20, n_text_layer=32),
+}
+TINY_DIMS = dict(n_audio_state=64, n_audio_head=2, n_audio_layer=2, n_text_state=64, n_text_head=2, n_text_layer=2)
+
+FIELDS = ["model", "weights", "device", "quantized", "cpu_opt", "vad", "audio_sec", "load_sec", "decode_sec", "infer_sec",
+          "package_sec", "total_sec", "rtf", "peak_rss_mb", "segments", "speedup_vs_fp32", "text_diff_vs_fp32"]
+
+def synth_audio(seconds, seed=0):
+    # 類語音訊號：約 4 秒的調幅諧波 + 雜訊，間隔 1.5 秒靜音
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    f0 = 140 + 40 * np.sin(2 * np.pi * 0.3 * t)
+    voice = sum(np.sin(2 * np.pi * k * np.cumsum(f0) / SAMPLE_RATE) / k for k in range(1, 6))
+    voice *= 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2
+    speaking = (t % 5.5) < 4.0
+    audio = 0.1 * voice * speaking + 0.003 * rng.standard_normal(len(t))
+    return audio.astype(np.float32)
+
+def write_fixture(path, seconds):
+    import soundfile as sf
+    sf.write(str(path), synth_audio(seconds), SAMPLE_RATE, subtype="PCM_16")
+    return path
+
+def load_app():
+    sys.path.insert(0, str(SCRIPT.parent))
+    spec = importlib.util.spec_from_file_location("run_whisper_auto", SCRIPT)
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    return app
+
+def load_model(model_choice, device, weights, quantize=False, cpu_opt=False):
+    import torch
+    import whisper
+    from whisper.model import ModelDimensions, Whisper
+    if cpu_opt:
+        # 與批次的 --cpu-opt 相同：inference mode、CPU 支援時 encoder bf16，並暖機（計入載入時間）
+        from cpu_optimize import optimize_cpu_model
+        return optimize_cpu_model(load_model(model_choice, device, weights, quantize), "fp32" if quantize else "auto")[0]
+    if quantize:
+        from quantize import load_quantized, quantize_linear
+        if weights == "pretrained":
+            return load_quantized(model_choice)[0]
+        return quantize_linear(load_model(model_choice, "cpu", weights))
+    if weights == "pretrained":
+        return whisper.load_model(model_choice, device=device)
+    torch.manual_seed(0)
+    dims = TINY_DIMS if weights == "tiny" else MODEL_DIMS[model_choice]
+    model = Whisper(ModelDimensions(n_mels=80, n_audio_ctx=1500, n_vocab=51865, n_text_ctx=448, **dims))
+    # whisper 以 torch.empty 建立 decoder 位置編碼（正式權重會覆蓋），隨機模型需自行初始化，否則可能出現 NaN
+    torch.nn.init.normal_(model.decoder.positional_embedding, std=0.01)
+    return model.to(device)
+
+def decode_audio(path):
+    import whisper
+    try:
+        return whisper.load_audio(str(path))
+    except FileNotFoundError:
+        # 沒有 ffmpeg 的 CI 環境：合成的 16 kHz wav 直接讀取
+        import soundfile as sf
+        return sf.read(str(path), dtype="float32")[0]
+
+def peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except (ImportError, AttributeError):
+            return None
+
+def run_case(model_choice, device, weights, fixtures, vad_options, out_dir, quantize=False, cpu_opt=False):
+    # 在獨立子行程執行，載入時間與峰值記憶體互不影響；轉錄訊息改印到 stderr，stdout 只留報表
+    warnings.filterwarnings("ignore")
+    with contextlib.redirect_stdout(sys.stderr):
+        return _run_case(model_choice, device, weights, fixtures, vad_options, out_dir, quantize, cpu_opt)
+
+def _run_case(model_choice, device, weights, fixtures, vad_options, out_dir, quantize=False, cpu_opt=False):
+    # 先匯入 whisper（連帶 torch）暖機：下面量測的模型載入時間不含套件匯入的數秒
+    importlib.import_module("whisper")
+    app = load_app()
+    timings = {}
+
+    def timed(name, fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+        return wrapper
+
+    app.run_model = timed("infer", app.run_model)
+    app.save_outputs = timed("package", app.save_outputs)
+
+    start = time.perf_counter()
+    model = load_model(model_choice, device, weights, quantize, cpu_opt)
+    load_sec = time.perf_counter() - start
+
+    # 暖機：第一次推論含 mel 濾波器載入等一次性成本，不列入結果
+    warmup = write_fixture(Path(out_dir) / "warmup.wav", 1)
+    app.transcribe_file(str(warmup), "Chinese", model, Path(out_dir), model_choice, verbose=None, audio=decode_audio(warmup))
+
+    records = []
+    for audio_sec, path in fixtures:
+        for vad in vad_options:
+            timings.clear()
+            start = time.perf_counter()
+            audio = decode_audio(path)
+            decode_sec = time.perf_counter() - start
+            zip_path = app.transcribe_file(str(path), "Chinese", model, Path(out_dir), model_choice,
+                                           verbose=None, audio=audio, vad=vad)
+            total_sec = time.perf_counter() - start
+            with app.zipfile.ZipFile(zip_path) as z:
+                segments = len(json.loads(z.read(next(n for n in z.namelist() if n.endswith("_segments_only.json"))))["segments"])
+                text = z.read(next(n for n in z.namelist() if n.endswith(".txt"))).decode("utf-8")
+            records.append({
+                "model": model_choice, "weights": weights, "device": device, "quantized": quantize, "cpu_opt": cpu_opt,
+                "vad": vad, "audio_sec": audio_sec,
+                "load_sec": round(load_sec, 3), "decode_sec": round(decode_sec, 3),
+                "infer_sec": round(timings.get("infer", 0.0), 3), "package_sec": round(timings.get("package", 0.0), 3),
+                "total_sec": round(total_sec, 3), "rtf": round(total_sec / audio_sec, 4),
+                "peak_rss_mb": None if peak_rss_mb() is None else round(peak_rss_mb(), 1), "segments": segments,
+                "speedup_vs_fp32": None, "text_diff_vs_fp32": None, "_text": text,
+            })
+    return records
+
+def add_baseline_deltas(records):
+    # 量化或 CPU 最佳化的結果與相同條件的一般 fp32 結果比較：RTF 加速倍數、轉錄文字不同的比例（0 = 完全相同）
+    def optimized(r):
+        return r["quantized"] or r.get("cpu_opt")
+
+    baseline = {(r["model"], r["weights"], r["device"], r["vad"], r["audio_sec"]): r
+                for r in records if not optimized(r)}
+    for r in records:
+        base = baseline.get((r["model"], r["weights"], r["device"], r["vad"], r["audio_sec"]))
+        if optimized(r) and base is not None:
+            r["speedup_vs_fp32"] = round(base["rtf"] / r["rtf"], 3) if r["rtf"] else None
+            r["text_diff_vs_fp32"] = round(1 - difflib.SequenceMatcher(None, base["_text"], r["_text"]).ratio(), 4)
+    for r in records:
+        r.pop("_text", None)
+    return records
+
+def run_benchmark(models, devices, lengths, weights="pretrained", vad_options=(False,), audio_files=(),
+                  quantize_options=(False,), cpu_opt_options=(False,)):
+    records = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fixtures = [(sec, write_fixture(Path(tmp_dir) / f"synth_{sec:g}s.wav", sec)) for sec in lengths]
+        for path in audio_files:
+            import soundfile as sf
+            fixtures.append((sf.info(str(path)).duration, Path(path)))
+        for model_choice in models:
+            for device in devices:
+                for quantize, cpu_opt in itertools.product(quantize_options, cpu_opt_options):
+                    if (quantize or cpu_opt) and device != "cpu":
+                        print(f"int8 量化與 CPU 最佳化只支援 CPU，略過 {model_choice} {device}", file=sys.stderr)
+                        continue
+                    label = ("int8" if quantize else "fp32") + ("+opt" if cpu_opt else "")
+                    with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as ex:
+                        case = ex.submit(run_case, model_choice, device, weights, fixtures, list(vad_options), tmp_dir,
+                                         quantize, cpu_opt)
+                        for r in case.result():
+                            records.append(r)
+                            print(f"{r['model']:<9} {r['device']:<5} {label:<8} "
+                                  f"vad={str(r['vad']):<5} {r['audio_sec']:>7.1f}s  "
+                                  f"RTF {r['rtf']:.3f}  推論 {r['infer_sec']:.2f}s  載入 {r['load_sec']:.2f}s  "
+                                  f"峰值 {r['peak_rss_mb']} MB", file=sys.stderr)
+    return add_baseline_deltas(records)
+
+def write_report(records, output):
+    if output is None:
+        json.dump(records, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    elif Path(output).suffix.lower() == ".csv":
+        with open(output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+    else:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Whisper 即時率（RTF）基準")
+    parser.add_argument("--models", default="base", help="以逗號分隔，如 base,medium,large-v2（預設 base）")
+    parser.add_argument("--devices", default="cpu", help="以逗號分隔，如 cpu,cuda（預設 cpu）")
+    parser.add_argument("--lengths", default="10,60", help="合成音訊長度（秒），以逗號分隔（預設 10,60）")
+    parser.add_argument("--weights", choices=["pretrained", "random", "tiny"], default="pretrained",
+                        help="pretrained=官方權重，random=同尺寸隨機權重，tiny=極小隨機模型（離線 / CI）")
+    parser.add_argument("--vad", choices=["off", "on", "both"], default="off", help="是否開啟 VAD 前處理（預設 off）")
+    parser.add_argument("--quantize", choices=["off", "on", "both"], default="off",
+                        help="CPU 動態 int8 量化；both 同時跑 fp32 與 int8 並列出加速倍數與文字差異（預設 off）")
+    parser.add_argument("--cpu-opt", choices=["off", "on", "both"], default="off",
+                        help="CPU 最佳化（inference mode、bf16、暖機）；both 同時跑一般與最佳化版本並列出加速倍數（預設 off）")
+    parser.add_argument("--audio", nargs="*", default=[], help="額外加入的實際音檔")
+    parser.add_argument("--output", help="輸出檔案（.json 或 .csv），未指定時以 JSON 輸出到 stdout")
+    args = parser.parse_args()
+
+    vad_options = {"off": (False,), "on": (True,), "both": (False, True)}[args.vad]
+    quantize_options = {"off": (False,), "on": (True,), "both": (False, True)}[args.quantize]
+    cpu_opt_options = {"off": (False,), "on": (True,), "both": (False, True)}[args.cpu_opt]
+    records = run_benchmark(args.models.split(","), args.devices.split(","),
+                            [float(x) for x in args.lengths.split(",")], args.weights, vad_options, args.audio,
+                            quantize_options, cpu_opt_options)
+    write_report(records, args.output)
+
+if __name__ == "__main__":
+    main()
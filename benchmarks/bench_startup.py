@@ -0,0 +1,61 @@
+# 啟動時間基準：量測不需推論的命令列路徑（--help、路徑不存在、覆蓋提示取消），
+# 並確認這些路徑不會載入 torch / whisper 等重量級套件
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "src" / "run_whisper_auto_1.8.py"
+HEAVY_MODULES = ("torch", "whisper", "opencc", "soundfile", "numpy")
+
+def scenarios(tmp_dir):
+    folder = Path(tmp_dir) / "media"
+    folder.mkdir(exist_ok=True)
+    (folder / "a.wav").touch()
+    (folder / "a(base).zip").touch()
+    return {
+        "help": (["--help"], ""),
+        "missing-path": (["--input-file", str(Path(tmp_dir) / "missing.wav")], ""),
+        "overwrite-cancel": (["--input-folder", str(folder), "--no-service"], "2\n"),
+    }
+
+def run_once(args, stdin=""):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", str(SCRIPT), *args], input=stdin,
+                          capture_output=True, text=True, encoding="utf-8", cwd=SCRIPT.parent)
+    elapsed = time.perf_counter() - start
+    imported = {line.split("|")[-1].strip() for line in proc.stderr.splitlines() if line.startswith("import time:")}
+    heavy = sorted(m for m in HEAVY_MODULES if m in imported)
+    return elapsed, heavy
+
+def bench(repeat=5):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report = {}
+        for name, (args, stdin) in scenarios(tmp_dir).items():
+            times, heavy = [], set()
+            for _ in range(repeat):
+                elapsed, loaded = run_once(args, stdin)
+                times.append(elapsed)
+                heavy.update(loaded)
+            report[name] = {"min": min(times), "median": statistics.median(times), "heavy": sorted(heavy)}
+        return report
+
+def main():
+    parser = argparse.ArgumentParser(description="命令列啟動時間基準")
+    parser.add_argument("--repeat", type=int, default=5, help="每個情境重複次數（預設 5）")
+    parser.add_argument("--max-sec", type=float, default=1.0, help="任一情境中位數超過此秒數即視為退化（預設 1.0）")
+    args = parser.parse_args()
+
+    regressed = False
+    for name, r in bench(args.repeat).items():
+        ok = r["median"] <= args.max_sec and not r["heavy"]
+        regressed |= not ok
+        heavy = f"  載入重量級套件：{', '.join(r['heavy'])}" if r["heavy"] else ""
+        print(f"{'✅' if ok else '❌'} {name:<18} 中位數 {r['median']:.3f}s  最快 {r['min']:.3f}s{heavy}")
+    sys.exit(1 if regressed else 0)
+
+if __name__ == "__main__":
+    main()
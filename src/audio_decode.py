@@ -0,0 +1,46 @@
+# 音訊解碼：與 whisper.audio.load_audio 相同（ffmpeg 轉成 16 kHz 單聲道 s16le），
+# 但 ffmpeg 的執行緒數由執行緒分配決定，不再以 -threads 0 讓 ffmpeg 自行佔用全部核心、與 torch 搶核心
+import subprocess
+import tempfile
+
+SAMPLE_RATE = 16000
+_decode_threads = 0  # 0 = 由 ffmpeg 自行決定（與 whisper 相同）
+
+def set_decode_threads(threads):
+    global _decode_threads
+    _decode_threads = max(0, int(threads or 0))
+
+def ffmpeg_command(file, sr=SAMPLE_RATE, threads=None):
+    threads = _decode_threads if threads is None else threads
+    return ["ffmpeg", "-nostdin", "-threads", str(threads), "-i", str(file),
+            "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sr), "-"]
+
+def load_audio(file, sr=SAMPLE_RATE, threads=None):
+    import numpy as np
+    try:
+        out = subprocess.run(ffmpeg_command(file, sr, threads), capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to load audio: {e.stderr.decode(errors='replace')}") from e
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+
+def stream_pcm(file, block_samples, sr=SAMPLE_RATE, threads=None):
+    # 串流解碼：每次產生 block_samples 個樣本（最後一段可能較短），整段 PCM 不會同時留在記憶體
+    import numpy as np
+    # stderr 寫入暫存檔：長音檔的 ffmpeg 訊息可能塞滿管線緩衝，讓 ffmpeg 卡住
+    with tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(ffmpeg_command(file, sr, threads), stdout=subprocess.PIPE, stderr=err)
+        try:
+            while True:
+                data = proc.stdout.read(block_samples * 2)
+                if not data:
+                    break
+                yield np.frombuffer(data[:len(data) // 2 * 2], np.int16).astype(np.float32) / 32768.0
+            if proc.wait() != 0:
+                err.seek(0)
+                raise RuntimeError(f"Failed to load audio: {err.read().decode(errors='replace')}")
+        finally:
+            # 提前結束（如重新從頭讀取）時停止 ffmpeg
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
@@ -0,0 +1,81 @@
+# CPU 推論最佳化：推論包在 torch.inference_mode；CPU 支援 bf16（AVX512-BF16 / AMX）時 encoder 以 bf16 autocast 計算，
+# 可另以 torch.compile 編譯 encoder。載入後先以一秒靜音暖機，編譯與 oneDNN 初始化等一次性成本不會算在第一個檔案上。
+# decoder 每步只處理少量 token，bf16 autocast 每步都要轉換權重，實測反而較慢，維持 fp32
+import sys
+import time
+import shutil
+import functools
+
+PRECISIONS = ("auto", "fp32", "bf16")
+WARMUP_SEC = 1.0
+
+def bf16_supported():
+    import torch
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+def resolve_precision(precision):
+    # 指定 bf16 但 CPU 不支援時以軟體模擬會更慢，改回 fp32
+    if precision == "fp32" or not bf16_supported():
+        return "fp32"
+    return "bf16"
+
+def compile_supported():
+    # torch.compile（inductor）在 CPU 上需要 C++ 編譯器
+    compilers = ("cl",) if sys.platform == "win32" else ("cc", "gcc", "clang")
+    return any(shutil.which(c) for c in compilers)
+
+def _inference(fn, bf16=False):
+    import torch
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with torch.inference_mode(), torch.autocast("cpu", dtype=torch.bfloat16, enabled=bf16):
+            out = fn(*args, **kwargs)
+        # whisper 的 decode 檢查 audio_features 為 fp32，decoder 也以 fp32 計算
+        return out.float() if bf16 else out
+    return wrapper
+
+def warmup(model, seconds=WARMUP_SEC):
+    import numpy as np
+    start = time.perf_counter()
+    model.transcribe(np.zeros(int(seconds * 16000), dtype=np.float32), language="en", verbose=None, fp16=False,
+                     temperature=0.0)
+    return time.perf_counter() - start
+
+def optimize_cpu_model(model, precision="auto", compile_encoder=False, warmup_sec=WARMUP_SEC):
+    # 直接修改並回傳 model 與說明：{"precision", "compiled", "warmup_sec"}
+    import torch
+    precision = resolve_precision(precision)
+    bf16 = precision == "bf16"
+    encoder_forward = model.encoder.forward
+    model.encoder.forward = _inference(encoder_forward, bf16)
+    # 包住整個 decode：logits 之後還會被 whisper 就地修改，不能在 inference mode 外處理 inference tensor
+    model.decode = _inference(model.decode)
+    model.transcribe = _inference(model.transcribe)
+    compiled = compile_encoder and compile_supported()
+    if compiled:
+        model.encoder.forward = _inference(torch.compile(encoder_forward), bf16)
+    info = {"precision": precision, "compiled": compiled, "warmup_sec": None}
+    if not warmup_sec:
+        return model, info
+    try:
+        info["warmup_sec"] = warmup(model, warmup_sec)
+    except Exception:
+        if not compiled:
+            raise
+        # 編譯失敗（缺少標頭檔、不支援的運算等）時退回未編譯的 encoder
+        model.encoder.forward = _inference(encoder_forward, bf16)
+        info["compiled"] = False
+        info["warmup_sec"] = warmup(model, warmup_sec)
+    return model, info
+
+def describe(info):
+    parts = ["inference mode", "encoder bf16" if info["precision"] == "bf16" else "fp32"]
+    if info["compiled"]:
+        parts.append("torch.compile")
+    if info["warmup_sec"] is not None:
+        parts.append(f"暖機 {info['warmup_sec']:.1f} 秒")
+    return "、".join(parts)
@@ -0,0 +1,66 @@
+# 檔案搜尋：以 os.scandir 逐一走訪資料夾（可遞迴），每掃完一個資料夾就交出其中的音檔，
+# 不必等整棵目錄掃完；同時記下各資料夾既有的 zip 檔名，檢查輸出是否存在時不必逐檔呼叫 exists()
+import os
+import fnmatch
+from pathlib import Path
+
+MEDIA_EXTS = (".mp3", ".mp4", ".m4a", ".wav")
+
+def _matches(patterns, rel, name):
+    # 樣式可比對相對路徑（如 2024-*/*.mp3）或單純檔名（如 *.wav）
+    return any(fnmatch.fnmatch(rel, pat) or fnmatch.fnmatch(name, pat) for pat in patterns)
+
+class MediaDiscovery:
+    def __init__(self, root, exts=MEDIA_EXTS, recursive=False, include=(), exclude=()):
+        self.root = os.path.normpath(str(root))
+        self.exts = tuple(e.lower() for e in exts)
+        self.recursive = recursive
+        self.include = list(include or ())
+        self.exclude = list(exclude or ())
+        self.outputs = {}  # 資料夾 -> 其中既有的 zip 檔名
+        self.scanned_dirs = 0
+
+    def _rel(self, path):
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def __iter__(self):
+        stack = [self.root]
+        while stack:
+            folder = stack.pop()
+            try:
+                with os.scandir(folder) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            self.scanned_dirs += 1
+            zips, media, subdirs = set(), [], []
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if self.recursive and not (self.exclude and _matches(self.exclude, self._rel(entry.path), entry.name)):
+                            subdirs.append(entry.path)
+                        continue
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                ext = os.path.splitext(entry.name)[1].lower()
+                if ext == ".zip":
+                    zips.add(entry.name)
+                elif ext in self.exts:
+                    media.append(entry)
+            self.outputs[folder] = zips
+            filtered = self.include or self.exclude
+            for entry in sorted(media, key=lambda e: e.name):
+                if filtered:
+                    rel = self._rel(entry.path)
+                    if self.include and not _matches(self.include, rel, entry.name):
+                        continue
+                    if _matches(self.exclude, rel, entry.name):
+                        continue
+                yield Path(entry.path)
+            # 深度優先、依名稱順序走訪子資料夾
+            stack.extend(sorted(subdirs, reverse=True))
+
+    def has_output(self, path, zip_name):
+        return zip_name in self.outputs.get(os.path.normpath(str(path.parent)), ())
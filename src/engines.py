@@ -0,0 +1,35 @@
+# 推論引擎：torch（預設，whisper 原生 PyTorch）與 onnx（ONNX Runtime，僅 CPU）。
+# 各引擎載入後都是 whisper 的 Whisper 物件，transcribe_file 與後續輸出流程不需要知道用的是哪一個
+import importlib.util
+
+from quantize import load_quantized
+from transcript_cache import DEFAULT_CACHE_DIR
+
+ENGINES = ("torch", "onnx")
+ONNX_REQUIREMENT = "pip install onnxruntime onnx"
+
+def engine_device(engine, device):
+    # ONNX 引擎只支援 CPU
+    return "cpu" if engine == "onnx" else device
+
+def check_engine(engine):
+    # 缺少選用套件時回傳錯誤訊息，可用時回傳 None
+    if engine not in ENGINES:
+        return f"未知的推論引擎：{engine}（可用：{'、'.join(ENGINES)}）"
+    # 只檢查是否已安裝，不在啟動時匯入
+    if engine == "onnx" and not all(importlib.util.find_spec(name) for name in ("onnxruntime", "onnx")):
+        return f"ONNX 引擎需要 onnxruntime 與 onnx 套件，請先安裝：{ONNX_REQUIREMENT}"
+    return None
+
+def load_engine(engine, model_choice, device, quantize=False, cache_dir=DEFAULT_CACHE_DIR):
+    # 回傳 (模型, 是否來自快取)；torch 引擎未量化時直接載入原始權重，視為來自快取
+    error = check_engine(engine)
+    if error:
+        raise RuntimeError(error)
+    if engine == "onnx":
+        from onnx_engine import load_onnx_model
+        return load_onnx_model(model_choice, cache_dir)
+    if quantize and device == "cpu":
+        return load_quantized(model_choice, cache_dir)
+    import whisper
+    return whisper.load_model(model_choice, device=device), True
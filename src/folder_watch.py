@@ -0,0 +1,128 @@
+# 資料夾監看：Linux 以 inotify 接收新檔事件，其他平台（或網路磁碟不支援時）定期掃描；
+# 檔案大小與修改時間持續 settle_sec 秒不變才視為寫入完成
+import os
+import sys
+import time
+import select
+import struct
+from pathlib import Path
+
+POLL_SEC = 1.0
+RESCAN_SEC = 30.0  # inotify 收不到網路磁碟上其他電腦寫入的事件，仍定期完整掃描
+
+# inotify 事件旗標（<sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+_EVENT = struct.Struct("iIII")
+
+def _inotify_open(folder):
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(fd, os.fsencode(str(folder)), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+class FolderWatcher:
+    def __init__(self, folder, exts, settle_sec=2.0, use_inotify=True):
+        self.folder = Path(folder)
+        self.exts = tuple(e.lower() for e in exts)
+        self.settle_sec = settle_sec
+        self._fd = _inotify_open(self.folder) if use_inotify else None
+        self._pending = {}  # 路徑 -> ((大小, 修改時間), 開始不變的時間)
+        self._emitted = {}  # 已交出的檔案 -> (大小, 修改時間)，內容不變就不再交出
+        self._rescan()
+
+    @property
+    def backend(self):
+        return "inotify" if self._fd is not None else "polling"
+
+    def _wanted(self, name):
+        return not name.startswith(".") and os.path.splitext(name)[1].lower() in self.exts
+
+    def _add(self, path):
+        if path not in self._pending:
+            self._pending[path] = (None, time.monotonic())
+
+    def _rescan(self):
+        self._last_scan = time.monotonic()
+        try:
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if self._wanted(entry.name) and entry.is_file():
+                        self._add(entry.path)
+        except OSError:
+            pass
+
+    def _read_events(self, timeout):
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        pos = 0
+        while pos + _EVENT.size <= len(data):
+            _, mask, _, name_len = _EVENT.unpack_from(data, pos)
+            name = data[pos + _EVENT.size:pos + _EVENT.size + name_len].rstrip(b"\0")
+            pos += _EVENT.size + name_len
+            if mask & IN_Q_OVERFLOW:
+                self._rescan()  # 事件佇列溢位，改為完整掃描一次
+            elif name and self._wanted(os.fsdecode(name)):
+                self._add(os.path.join(str(self.folder), os.fsdecode(name)))
+
+    def _settled(self):
+        now = time.monotonic()
+        ready = []
+        for path, (sig, since) in list(self._pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._pending[path]
+                continue
+            current = (st.st_size, st.st_mtime_ns)
+            if self._emitted.get(path) == current:
+                del self._pending[path]
+            elif current != sig:
+                self._pending[path] = (current, now)
+            elif st.st_size > 0 and now - since >= self.settle_sec:
+                del self._pending[path]
+                self._emitted[path] = current
+                ready.append(Path(path))
+        return sorted(ready)
+
+    def poll(self, timeout=POLL_SEC):
+        # 等待最多 timeout 秒，回傳已寫入完成、尚未交出過的檔案
+        if self._fd is not None:
+            self._read_events(timeout)
+            if time.monotonic() - self._last_scan >= RESCAN_SEC:
+                self._rescan()
+        else:
+            time.sleep(timeout)
+            self._rescan()
+        return self._settled()
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
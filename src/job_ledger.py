@@ -0,0 +1,93 @@
+# 批次工作紀錄：SQLite 記錄每個檔案的狀態，中斷後可用 --resume 續跑
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+LEDGER_NAME = ".whisper_jobs.sqlite"
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+class JobLedger:
+    def __init__(self, db_path, model_choice, language=None):
+        self.db_path = Path(db_path)
+        self.model_choice = model_choice
+        self.language = language
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                path TEXT NOT NULL,
+                model TEXT NOT NULL,
+                language TEXT,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                started_at REAL,
+                finished_at REAL,
+                duration_sec REAL,
+                output TEXT,
+                error TEXT,
+                PRIMARY KEY (path, model)
+            )""")
+        self._conn.commit()
+
+    @staticmethod
+    def _key(path):
+        return str(Path(path).resolve())
+
+    def _execute(self, sql, params):
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._conn.commit()
+
+    def states(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT path, state FROM jobs WHERE model = ?", (self.model_choice,)).fetchall()
+        return dict(rows)
+
+    def iter_remaining(self, paths, only_failed=False):
+        # 只讀取一次目前狀態，paths 可以是邊搜尋邊產生的 iterator
+        states = self.states()
+        for p in paths:
+            state = states.get(self._key(p))
+            if (state == FAILED) if only_failed else (state != DONE):
+                yield p
+
+    def remaining(self, paths, only_failed=False):
+        return list(self.iter_remaining(paths, only_failed))
+
+    def register(self, paths):
+        with self._lock:
+            self._conn.executemany("""
+                INSERT INTO jobs (path, model, language, state) VALUES (?, ?, ?, ?)
+                ON CONFLICT(path, model) DO UPDATE SET state = excluded.state, language = excluded.language, started_at = NULL
+            """, [(self._key(p), self.model_choice, self.language, PENDING) for p in paths])
+            self._conn.commit()
+
+    def mark_running(self, path):
+        # 真正開始轉錄時才呼叫；平行批次由 worker 行程以自己的連線寫入
+        now = time.time()
+        self._execute("""
+            UPDATE jobs SET state = ?, attempts = attempts + 1, started_at = ?, error = NULL
+            WHERE path = ? AND model = ?
+        """, (RUNNING, now, self._key(path), self.model_choice))
+
+    def mark_done(self, path, output):
+        # 耗時以資料庫中的 started_at 計算，開始與完成可由不同行程記錄；沒有開始時間（如快取命中）記為 0
+        now = time.time()
+        self._execute("""
+            UPDATE jobs SET state = ?, finished_at = ?, duration_sec = ? - COALESCE(started_at, ?), output = ?
+            WHERE path = ? AND model = ?
+        """, (DONE, now, now, now, str(output), self._key(path), self.model_choice))
+
+    def mark_failed(self, path, error):
+        now = time.time()
+        self._execute("""
+            UPDATE jobs SET state = ?, finished_at = ?, duration_sec = ? - COALESCE(started_at, ?), error = ?
+            WHERE path = ? AND model = ?
+        """, (FAILED, now, now, now, str(error), self._key(path), self.model_choice))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
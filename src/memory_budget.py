@@ -0,0 +1,131 @@
+# 記憶體准入控制：載入模型或啟動 worker 前，估計每份模型的常駐記憶體與每個檔案的音訊緩衝，與目前可用記憶體比較；
+# 放不下時減少 worker 數、改用較小的模型，或讓長檔案排隊等其他檔案完成，避免批次跑到一半被 OOM 終止
+import sys
+
+MB = 1024 * 1024
+# 每份模型推論時的常駐量（MB），與 whisper 官方 README 列的需求相近（base 約 1 GB、medium 約 5 GB、large 約 10 GB）；
+# whisper 載入時先在主記憶體建立 fp32 模型再搬到 GPU，GPU 模式載入當下也需要這麼多主記憶體
+MODEL_MEMORY_MB = {"base": 1024, "medium": 5 * 1024, "large-v2": 10 * 1024}
+INT8_RATIO = 0.5  # 動態 int8 量化：Linear 權重縮為 1/4，其餘維持 fp32
+PCM_BYTES_PER_SEC = 16000 * 4  # 16 kHz float32 PCM：1 小時約 230 MB
+# transcribe 先對整段音訊算 log-mel，STFT（complex64）、功率譜與 mel 同時存在，工作記憶體約為 PCM 的 4 倍
+AUDIO_WORKING_FACTOR = 4
+HEADROOM = 0.85  # 只規劃可用記憶體的 85%，其餘留給系統與其他程式
+DOWNGRADES = ("large-v2", "medium", "base")
+
+def _linux_available_mb():
+    available = None
+    try:
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) / 1024
+                    break
+    except (OSError, ValueError):
+        pass
+    # 容器（cgroup v2）的記憶體上限可能比整台機器小
+    try:
+        with open("/sys/fs/cgroup/memory.max", encoding="ascii") as f:
+            limit = f.read().strip()
+        with open("/sys/fs/cgroup/memory.current", encoding="ascii") as f:
+            used = int(f.read())
+        if limit != "max":
+            left = (int(limit) - used) / MB
+            available = left if available is None else min(available, left)
+    except (OSError, ValueError):
+        pass
+    return available
+
+def _windows_available_mb():
+    import ctypes
+
+    class MEMORYSTATUSEX(ctypes.Structure):
+        _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                    ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                    ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                    ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                    ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+    status = MEMORYSTATUSEX()
+    status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+    if not ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+        return None
+    return status.ullAvailPhys / MB
+
+def available_memory_mb():
+    # 無法判斷時回傳 None（不做准入控制）
+    try:
+        if sys.platform.startswith("linux"):
+            available = _linux_available_mb()
+            if available is not None:
+                return available
+        elif sys.platform == "win32":
+            return _windows_available_mb()
+    except (OSError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.virtual_memory().available / MB
+    except ImportError:
+        return None
+
+def gpu_free_memory_mb():
+    try:
+        import torch
+        return torch.cuda.mem_get_info()[0] / MB
+    except (ImportError, RuntimeError, AssertionError):
+        return None
+
+def model_memory_mb(model_choice, quantize=False):
+    size = MODEL_MEMORY_MB.get(model_choice, MODEL_MEMORY_MB["large-v2"])
+    return size * INT8_RATIO if quantize else size
+
+def audio_memory_mb(seconds):
+    return (seconds or 0) * PCM_BYTES_PER_SEC * AUDIO_WORKING_FACTOR / MB
+
+def gb(mb):
+    return f"{mb / 1024:.1f} GB"
+
+def fit_model(model_choice, available_mb, quantize=False):
+    # 回傳 (模型, 說明或 None)：一份模型都放不下時改用放得下的較小模型；都放不下時維持原模型並警告
+    if available_mb is None:
+        return model_choice, None
+    budget = available_mb * HEADROOM
+    need = model_memory_mb(model_choice, quantize)
+    if need <= budget:
+        return model_choice, None
+    start = DOWNGRADES.index(model_choice) + 1 if model_choice in DOWNGRADES else 0
+    for smaller in DOWNGRADES[start:]:
+        if model_memory_mb(smaller, quantize) <= budget:
+            return smaller, f"可用記憶體約 {gb(available_mb)}，{model_choice} 約需 {gb(need)}，改用 {smaller}"
+    return model_choice, f"可用記憶體約 {gb(available_mb)}，{model_choice} 約需 {gb(need)}，可能因記憶體不足而中止"
+
+def fit_workers(workers, model_mb, available_mb, audio_sec=0):
+    # 回傳 (worker 數, 音訊緩衝預算 MB 或 None, 說明或 None)；每個 worker 以一份模型加一般長度檔案的音訊緩衝估計
+    if available_mb is None:
+        return workers, None, None
+    budget = available_mb * HEADROOM
+    need = model_mb + audio_memory_mb(audio_sec)
+    fit = min(workers, int(budget // need))
+    note = None
+    if fit < 1:
+        fit = 1
+        note = f"可用記憶體約 {gb(available_mb)}，每個 worker 約需 {gb(need)}，可能因記憶體不足而中止"
+    elif fit < workers:
+        note = f"可用記憶體約 {gb(available_mb)}，每個 worker 約需 {gb(need)}，worker 數由 {workers} 降為 {fit}"
+    return fit, max(0.0, budget - fit * model_mb), note
+
+class AudioAdmission:
+    # 平行批次送出檔案前檢查：進行中檔案的音訊緩衝總和超過預算時，先等其他檔案完成再送（至少保留一個進行中）
+    def __init__(self, budget_mb):
+        self.budget_mb = budget_mb
+        self.inflight_mb = 0.0
+
+    def fits(self, mb):
+        return self.budget_mb is None or self.inflight_mb == 0 or self.inflight_mb + mb <= self.budget_mb
+
+    def acquire(self, mb):
+        self.inflight_mb += mb
+
+    def release(self, mb):
+        self.inflight_mb = max(0.0, self.inflight_mb - mb)
@@ -0,0 +1,306 @@
+# 效能量測：每個檔案各階段耗時、音訊秒數、RTF、峰值記憶體、溫度回退次數，
+# 寫入 JSON Lines，可另外輸出 Prometheus textfile；未啟用時每個量測點只多一次屬性判斷
+import os
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+from contextlib import contextmanager, nullcontext
+
+METRICS_LOG_NAME = "whisper_metrics.jsonl"
+RSS_SAMPLE_SEC = 0.2  # 每個檔案的峰值記憶體以背景執行緒定期取樣
+
+_NULL = nullcontext()
+
+def peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except (ImportError, AttributeError):
+            return None
+
+def current_rss_mb():
+    # Linux 讀 /proc/self/statm，其他平台需要 psutil
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        try:
+            import psutil
+            return psutil.Process().memory_info().rss / (1024 * 1024)
+        except ImportError:
+            return None
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.log_path = None
+        self.run_id = None
+        self._records = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._sampler = None
+
+    def enable(self, log_path, run_id=None):
+        self.enabled = True
+        self.log_path = Path(log_path)
+        self.run_id = run_id or f"{int(time.time())}-{os.getpid()}"
+        if self._sampler is None and current_rss_mb() is not None:
+            self._sampler = threading.Thread(target=self._sample_rss, daemon=True)
+            self._sampler.start()
+
+    def _sample_rss(self):
+        # 同時處理中的檔案（管線、打包批次）都記上取樣到的值
+        while True:
+            time.sleep(RSS_SAMPLE_SEC)
+            rss = current_rss_mb()
+            with self._lock:
+                for rec in self._records.values():
+                    rec["peak_rss"] = max(rec["peak_rss"] or 0.0, rss)
+
+    def config(self):
+        # 傳給子行程（worker）沿用同一份紀錄檔與批次編號
+        return (str(self.log_path), self.run_id) if self.enabled else None
+
+    def _keys(self):
+        return getattr(self._local, "keys", ())
+
+    @contextmanager
+    def _current(self, keys):
+        prev = self._keys()
+        self._local.keys = keys
+        try:
+            yield
+        finally:
+            self._local.keys = prev
+
+    def current(self, paths):
+        # 之後在此執行緒量到的時間都記在這些檔案上（多檔共用時平均分攤）
+        if not self.enabled:
+            return _NULL
+        if isinstance(paths, (list, tuple)):
+            return self._current(tuple(str(p) for p in paths))
+        return self._current((str(paths),))
+
+    def _record(self, key):
+        rec = self._records.get(key)
+        if rec is None:
+            rec = self._records[key] = {"start": time.time(), "stages": {}, "counters": {}, "fields": {},
+                                        "peak_rss": current_rss_mb()}
+        return rec
+
+    def add(self, name, sec, keys=None):
+        keys = self._keys() if keys is None else keys
+        if not keys:
+            return
+        share = sec / len(keys)
+        with self._lock:
+            for key in keys:
+                stages = self._record(key)["stages"]
+                stages[name] = stages.get(name, 0.0) + share
+
+    @contextmanager
+    def _timed(self, name):
+        keys = self._keys()
+        with self._lock:
+            for key in keys:
+                self._record(key)  # 階段開始時就建立紀錄，峰值記憶體取樣才涵蓋此階段
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, keys)
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL
+        return self._timed(name)
+
+    def count(self, name, n=1):
+        # 計數記在第一個檔案上，批次總數才不會重複計算
+        if not self.enabled or not self._keys():
+            return
+        with self._lock:
+            counters = self._record(self._keys()[0])["counters"]
+            counters[name] = counters.get(name, 0) + n
+
+    def note(self, **fields):
+        if not self.enabled or not self._keys():
+            return
+        with self._lock:
+            self._record(self._keys()[0])["fields"].update(fields)
+
+    def finish(self, path, status, **fields):
+        if not self.enabled:
+            return
+        with self._lock:
+            rec = self._records.pop(str(path), None)
+        if rec is None:
+            return  # 此檔案在其他行程處理，由該行程寫入
+        stages = rec["stages"]
+        if "infer.decode" in stages:
+            # decode 包含 encoder 前向，扣掉後才是 decoder 逐 token 的時間
+            stages["infer.decoder"] = max(0.0, stages.pop("infer.decode") - stages.get("infer.encoder", 0.0))
+        busy = sum(v for k, v in stages.items() if "." not in k)
+        # 處理此檔期間的峰值；無法取樣時退回整個行程的峰值
+        rss = current_rss_mb()
+        peak = max(rec["peak_rss"] or 0.0, rss) if rss is not None else peak_rss_mb()
+        audio_sec = rec["fields"].pop("audio_sec", None)
+        line = {
+            "run": self.run_id, "time": round(time.time(), 3), "pid": os.getpid(), "file": str(path),
+            "status": status, "audio_sec": None if audio_sec is None else round(audio_sec, 3),
+            "wall_sec": round(time.time() - rec["start"], 4), "busy_sec": round(busy, 4),
+            "rtf": round(busy / audio_sec, 4) if audio_sec else None,
+            "stages": {k: round(v, 4) for k, v in sorted(stages.items())},
+            "fallbacks": rec["counters"].get("fallbacks", 0), "decode_passes": rec["counters"].get("decode_passes", 0),
+            "counters": rec["counters"], "peak_rss_mb": None if peak is None else round(peak, 1),
+            **rec["fields"], **fields,
+        }
+        text = json.dumps(line, ensure_ascii=False) + "\n"
+        with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(text)
+
+    def attach(self, model):
+        # 在模型上掛 encoder 計時與 decode 次數／溫度回退計數；未啟用時不做任何修改
+        if not self.enabled or getattr(model, "_metrics_attached", False):
+            return
+        model._metrics_attached = True
+        sync = _cuda_sync if model.device.type == "cuda" else None
+
+        def encoder_pre(module, args):
+            if sync:
+                sync()
+            self._local.encoder_start = time.perf_counter()
+
+        def encoder_post(module, args, output):
+            if sync:
+                sync()
+            self.add("infer.encoder", time.perf_counter() - self._local.encoder_start)
+
+        model.encoder.register_forward_pre_hook(encoder_pre)
+        model.encoder.register_forward_hook(encoder_post)
+
+        decode = model.decode
+
+        def counted_decode(mel, options=None, **kwargs):
+            self.count("decode_passes")
+            if options is not None and options.temperature > 0:
+                self.count("fallbacks")
+            with self.stage("infer.decode"):
+                return decode(mel, options, **kwargs) if options is not None else decode(mel, **kwargs)
+
+        model.decode = counted_decode
+        _patch_log_mel(self)
+
+def _cuda_sync():
+    import torch
+    torch.cuda.synchronize()
+
+_log_mel_patched = False
+
+def _patch_log_mel(metrics):
+    # model.transcribe 內部一次算完整段 log-mel，包一層計時
+    global _log_mel_patched
+    if _log_mel_patched:
+        return
+    import importlib
+    transcribe_module = importlib.import_module("whisper.transcribe")
+    log_mel = transcribe_module.log_mel_spectrogram
+
+    def timed_log_mel(*args, **kwargs):
+        with metrics.stage("infer.log_mel"):
+            return log_mel(*args, **kwargs)
+
+    transcribe_module.log_mel_spectrogram = timed_log_mel
+    _log_mel_patched = True
+
+def load_run(log_path, run_id):
+    records = []
+    with open(log_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if rec.get("run") == run_id:
+                records.append(rec)
+    return records
+
+def summarize(records):
+    # status 為 partial 的紀錄是同一檔案在其他行程的部分工作（如長音檔切段推論），只計入階段耗時
+    files = [r for r in records if r["status"] != "partial"]
+    stages = {}
+    for r in records:
+        for k, v in r["stages"].items():
+            stages[k] = stages.get(k, 0.0) + v
+    audio_sec = sum(r["audio_sec"] or 0.0 for r in files)
+    busy_sec = sum(v for k, v in stages.items() if "." not in k)
+    peaks = [r["peak_rss_mb"] for r in records if r.get("peak_rss_mb") is not None]
+    return {
+        "files": len(files),
+        "done": sum(r["status"] == "done" for r in files),
+        "failed": sum(r["status"] == "failed" for r in files),
+        "audio_sec": audio_sec,
+        "busy_sec": busy_sec,
+        "rtf": busy_sec / audio_sec if audio_sec else None,
+        "stages": stages,
+        "fallbacks": sum(r.get("fallbacks", 0) for r in records),
+        "decode_passes": sum(r.get("decode_passes", 0) for r in records),
+        "cache_hits": sum(r.get("counters", {}).get("cache_hits", 0) for r in records),
+        "peak_rss_mb": max(peaks) if peaks else None,
+    }
+
+def print_summary(summary, wall_sec=None):
+    rtf = f"，RTF {summary['rtf']:.3f}" if summary["rtf"] is not None else ""
+    wall = f"，實際經過 {wall_sec:.1f} 秒" if wall_sec is not None else ""
+    print(f"\n📊 效能摘要：{summary['files']} 個檔案（完成 {summary['done']}、失敗 {summary['failed']}），"
+          f"音訊 {summary['audio_sec']:.1f} 秒，處理 {summary['busy_sec']:.1f} 秒{rtf}{wall}")
+    busy = summary["busy_sec"] or 1.0
+    for name, sec in sorted(summary["stages"].items(), key=lambda kv: (kv[0].split(".")[0], "." in kv[0], kv[0])):
+        indent = "     " if "." in name else "   "
+        share = f"（{sec / busy:.0%}）" if "." not in name else ""
+        print(f"{indent}{name:<16}{sec:9.2f} 秒{share}")
+    peak = f"，峰值記憶體 {summary['peak_rss_mb']:.0f} MB" if summary["peak_rss_mb"] is not None else ""
+    print(f"   溫度回退 {summary['fallbacks']} 次（共解碼 {summary['decode_passes']} 次），快取命中 {summary['cache_hits']} 個{peak}")
+
+def write_prometheus(summary, path):
+    lines = [
+        "# HELP whisper_batch_files Files processed in the last batch by status.",
+        "# TYPE whisper_batch_files gauge",
+        f'whisper_batch_files{{status="done"}} {summary["done"]}',
+        f'whisper_batch_files{{status="failed"}} {summary["failed"]}',
+        "# HELP whisper_batch_audio_seconds Audio seconds processed in the last batch.",
+        "# TYPE whisper_batch_audio_seconds gauge",
+        f"whisper_batch_audio_seconds {summary['audio_sec']:.3f}",
+        "# HELP whisper_batch_stage_seconds Time spent per stage in the last batch.",
+        "# TYPE whisper_batch_stage_seconds gauge",
+    ]
+    lines += [f'whisper_batch_stage_seconds{{stage="{k}"}} {v:.4f}' for k, v in sorted(summary["stages"].items())]
+    lines += [
+        "# HELP whisper_batch_rtf Real-time factor (processing seconds / audio seconds) of the last batch.",
+        "# TYPE whisper_batch_rtf gauge",
+        f"whisper_batch_rtf {summary['rtf'] if summary['rtf'] is not None else 'NaN'}",
+        "# HELP whisper_batch_fallbacks Temperature fallback decode passes in the last batch.",
+        "# TYPE whisper_batch_fallbacks gauge",
+        f"whisper_batch_fallbacks {summary['fallbacks']}",
+        "# HELP whisper_batch_peak_rss_bytes Peak resident memory of the batch processes.",
+        "# TYPE whisper_batch_peak_rss_bytes gauge",
+        f"whisper_batch_peak_rss_bytes {int((summary['peak_rss_mb'] or 0) * 1024 * 1024)}",
+        "# HELP whisper_batch_last_run_timestamp_seconds Unix time the last batch finished.",
+        "# TYPE whisper_batch_last_run_timestamp_seconds gauge",
+        f"whisper_batch_last_run_timestamp_seconds {time.time():.0f}",
+    ]
+    # node_exporter textfile collector 會讀取中途的檔案，先寫暫存檔再取代
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
+
+METRICS = Metrics()
@@ -0,0 +1,240 @@
+# ONNX Runtime 推論引擎：把 whisper 的 encoder、cross-attention key/value 與逐 token 的 decoder
+# 匯出成三個 ONNX 圖並快取，之後不必再載入 PyTorch 權重；轉錄流程（切窗、溫度回退、時間戳）
+# 仍使用 whisper 的 transcribe / decode，只把 encoder 與 decoder 的前向換成 ONNX Runtime，
+# 因此結果結構與 torch 引擎相同
+import os
+import json
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+
+from transcript_cache import DEFAULT_CACHE_DIR
+
+ONNX_DIR_NAME = "onnx"
+OPSET = 17
+GRAPHS = ("encoder.onnx", "cross_kv.onnx", "decoder.onnx")
+
+def onnx_dir(model_choice, cache_dir=DEFAULT_CACHE_DIR):
+    import whisper
+    return Path(cache_dir) / ONNX_DIR_NAME / f"{model_choice}-whisper{whisper.__version__}"
+
+# key/value 快取直接存成注意力計算用的排列：key 為 (batch, head, head_dim, 長度) 並已乘上縮放係數，
+# value 為 (batch, head, 長度, head_dim)；每一步不必再對整段 cross-attention key/value 轉置與縮放
+def _keys(k, n_head):
+    n_batch, n_ctx, n_state = k.shape
+    return k.view(n_batch, n_ctx, n_head, -1).permute(0, 2, 3, 1) * (n_state // n_head) ** -0.25
+
+def _values(v, n_head):
+    n_batch, n_ctx, _ = v.shape
+    return v.view(n_batch, n_ctx, n_head, -1).permute(0, 2, 1, 3)
+
+def _attention(q, k, v, n_head, mask=None):
+    # 與 whisper MultiHeadAttention.qkv_attention 相同的計算，k / v 為 _keys / _values 的排列
+    import torch
+    n_batch, n_ctx, n_state = q.shape
+    q = q.view(n_batch, n_ctx, n_head, -1).permute(0, 2, 1, 3) * (n_state // n_head) ** -0.25
+    qk = q @ k
+    if mask is not None:
+        qk = qk + mask
+    w = torch.softmax(qk.float(), dim=-1).to(q.dtype)
+    return (w @ v).permute(0, 2, 1, 3).flatten(start_dim=2)
+
+def _export_modules(model):
+    import torch
+
+    class Encoder(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.encoder = model.encoder
+
+        def forward(self, mel):
+            return self.encoder(mel)
+
+    class CrossKV(torch.nn.Module):
+        # 每段音訊只算一次的 cross-attention key/value
+        def __init__(self):
+            super().__init__()
+            self.blocks = model.decoder.blocks
+
+        def forward(self, audio_features):
+            out = []
+            for block in self.blocks:
+                n_head = block.cross_attn.n_head
+                out += [_keys(block.cross_attn.key(audio_features), n_head),
+                        _values(block.cross_attn.value(audio_features), n_head)]
+            return tuple(out)
+
+    class DecoderStep(torch.nn.Module):
+        # 輸入新 token 與先前的 self-attention key/value，輸出 logits 與更新後的 key/value
+        def __init__(self):
+            super().__init__()
+            self.decoder = model.decoder
+
+        def forward(self, tokens, *caches):
+            dec = self.decoder
+            n_layer = len(dec.blocks)
+            cross, past = caches[:2 * n_layer], caches[2 * n_layer:]
+            offset = past[1].shape[2]
+            n_ctx = tokens.shape[1]
+            x = dec.token_embedding(tokens) + dec.positional_embedding[offset:offset + n_ctx]
+            mask = dec.mask[offset:offset + n_ctx, :offset + n_ctx]
+            present = []
+            for i, block in enumerate(dec.blocks):
+                h = block.attn_ln(x)
+                n_head = block.attn.n_head
+                k = torch.cat([past[2 * i], _keys(block.attn.key(h), n_head)], dim=3)
+                v = torch.cat([past[2 * i + 1], _values(block.attn.value(h), n_head)], dim=2)
+                present += [k, v]
+                x = x + block.attn.out(_attention(block.attn.query(h), k, v, block.attn.n_head, mask))
+                h = block.cross_attn_ln(x)
+                x = x + block.cross_attn.out(_attention(block.cross_attn.query(h), cross[2 * i], cross[2 * i + 1],
+                                                        block.cross_attn.n_head))
+                x = x + block.mlp(block.mlp_ln(x))
+            x = dec.ln(x)
+            logits = (x @ dec.token_embedding.weight.t()).float()
+            return (logits, *present)
+
+    return Encoder().eval(), CrossKV().eval(), DecoderStep().eval()
+
+def export_onnx(model, out_dir):
+    # 先匯出到暫存資料夾再改名，多個行程同時匯出時不會讀到寫到一半的檔案
+    import dataclasses
+    import warnings
+    import torch
+    out_dir = Path(out_dir)
+    tmp = out_dir.with_name(f"{out_dir.name}.{os.getpid()}.tmp")
+    tmp.mkdir(parents=True, exist_ok=True)
+    dims = model.dims
+    n_layer = dims.n_text_layer
+    encoder, cross_kv, step = _export_modules(model.float().cpu().eval())
+
+    mel = torch.zeros(1, dims.n_mels, 2 * dims.n_audio_ctx)
+    audio_features = torch.zeros(1, dims.n_audio_ctx, dims.n_audio_state)
+    kv_names = [f"{kind}{i}" for i in range(n_layer) for kind in ("k", "v")]
+    head_dim = dims.n_text_state // dims.n_text_head
+    cross = cross_kv(audio_features)
+    past = tuple(torch.zeros(1, dims.n_text_head, head_dim, 2) if i % 2 == 0 else
+                 torch.zeros(1, dims.n_text_head, 2, head_dim) for i in range(2 * n_layer))
+    tokens = torch.zeros(1, 3, dtype=torch.long)
+
+    with warnings.catch_warnings(), torch.no_grad():
+        warnings.simplefilter("ignore")  # TorchScript 匯出器的棄用與 tracer 提示
+        common = dict(opset_version=OPSET, dynamo=False, do_constant_folding=True)
+        torch.onnx.export(encoder, (mel,), str(tmp / "encoder.onnx"), input_names=["mel"],
+                          output_names=["audio_features"],
+                          dynamic_axes={"mel": {0: "batch"}, "audio_features": {0: "batch"}}, **common)
+        torch.onnx.export(cross_kv, (audio_features,), str(tmp / "cross_kv.onnx"), input_names=["audio_features"],
+                          output_names=[f"cross_{n}" for n in kv_names],
+                          dynamic_axes={"audio_features": {0: "batch"}, **{f"cross_{n}": {0: "batch"} for n in kv_names}},
+                          **common)
+        torch.onnx.export(step, (tokens, *cross, *past), str(tmp / "decoder.onnx"),
+                          input_names=["tokens"] + [f"cross_{n}" for n in kv_names] + [f"past_{n}" for n in kv_names],
+                          output_names=["logits"] + [f"present_{n}" for n in kv_names],
+                          dynamic_axes={"tokens": {0: "batch", 1: "tokens"}, "logits": {0: "batch", 1: "tokens"},
+                                        **{f"cross_{n}": {0: "batch"} for n in kv_names},
+                                        **{f"past_{n}": {0: "batch", (3 if n[0] == "k" else 2): "past"} for n in kv_names},
+                                        **{f"present_{n}": {0: "batch", (3 if n[0] == "k" else 2): "total"}
+                                           for n in kv_names}},
+                          **common)
+    with open(tmp / "dims.json", "w", encoding="utf-8") as f:
+        json.dump(dataclasses.asdict(dims), f)
+    try:
+        os.replace(tmp, out_dir)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # 其他行程已先匯出完成
+    return out_dir
+
+def _session(path, threads):
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+
+def _onnx_modules():
+    import torch
+    from whisper.model import Whisper
+
+    class OnnxEncoder(torch.nn.Module):
+        def __init__(self, session):
+            super().__init__()
+            self.session = session
+
+        def forward(self, mel):
+            out = self.session.run(None, {"mel": mel.detach().float().cpu().numpy()})[0]
+            return torch.from_numpy(out)
+
+    class OnnxDecoder(torch.nn.Module):
+        # kv_cache 沿用 whisper PyTorchInference 傳入的 dict：self-attention 的 key/value 以 blocks[i].attn.key /
+        # value 為鍵存放，beam search 的 rearrange_kv_cache 因此能照常依 batch 重排
+        def __init__(self, cross_session, step_session, n_layer, n_head, n_state):
+            super().__init__()
+            self.cross_session = cross_session
+            self.step_session = step_session
+            self.n_head = n_head
+            self.head_dim = n_state // n_head
+            self.blocks = [SimpleNamespace(attn=SimpleNamespace(key=object(), value=object()),
+                                           cross_key=object(), cross_value=object()) for _ in range(n_layer)]
+
+        def forward(self, x, xa, kv_cache=None):
+            cache = {} if kv_cache is None else kv_cache
+            blocks = self.blocks
+            if blocks[0].cross_key not in cache:
+                outs = self.cross_session.run(None, {"audio_features": xa.detach().float().cpu().numpy()})
+                for i, block in enumerate(blocks):
+                    cache[block.cross_key] = outs[2 * i]
+                    cache[block.cross_value] = outs[2 * i + 1]
+            feeds = {"tokens": x.detach().cpu().numpy().astype("int64")}
+            for i, block in enumerate(blocks):
+                if block.attn.key not in cache:
+                    cache[block.attn.key] = torch.zeros(x.shape[0], self.n_head, self.head_dim, 0)
+                    cache[block.attn.value] = torch.zeros(x.shape[0], self.n_head, 0, self.head_dim)
+                feeds[f"cross_k{i}"] = cache[block.cross_key]
+                feeds[f"cross_v{i}"] = cache[block.cross_value]
+                feeds[f"past_k{i}"] = cache[block.attn.key].numpy()
+                feeds[f"past_v{i}"] = cache[block.attn.value].numpy()
+            outs = self.step_session.run(None, feeds)
+            for i, block in enumerate(blocks):
+                cache[block.attn.key] = torch.from_numpy(outs[1 + 2 * i])
+                cache[block.attn.value] = torch.from_numpy(outs[2 + 2 * i])
+            return torch.from_numpy(outs[0])
+
+    class OnnxWhisper(Whisper):
+        # 沿用 Whisper 的 transcribe / decode / detect_language，不建立任何 PyTorch 權重
+        def __init__(self, dims, encoder, decoder):
+            torch.nn.Module.__init__(self)
+            self.dims = dims
+            self.encoder = encoder
+            self.decoder = decoder
+
+        @property
+        def device(self):
+            return torch.device("cpu")
+
+        def install_kv_cache_hooks(self, cache=None):
+            return ({**cache} if cache is not None else {}), []
+
+    return OnnxEncoder, OnnxDecoder, OnnxWhisper
+
+def load_onnx_model(model_choice, cache_dir=DEFAULT_CACHE_DIR, loader=None, threads=None):
+    # 回傳 (模型, 是否來自快取)；第一次使用時以 loader（預設 whisper.load_model）載入 PyTorch 權重並匯出
+    import torch
+    from whisper.model import ModelDimensions
+    out_dir = onnx_dir(model_choice, cache_dir)
+    cached = all((out_dir / name).exists() for name in GRAPHS + ("dims.json",))
+    if not cached:
+        if loader is None:
+            import whisper
+            loader = whisper.load_model
+        model = loader(model_choice, device="cpu")
+        export_onnx(model, out_dir)
+        del model
+
+    with open(out_dir / "dims.json", encoding="utf-8") as f:
+        dims = ModelDimensions(**json.load(f))
+    threads = threads or torch.get_num_threads()
+    OnnxEncoder, OnnxDecoder, OnnxWhisper = _onnx_modules()
+    encoder = OnnxEncoder(_session(out_dir / "encoder.onnx", threads))
+    decoder = OnnxDecoder(_session(out_dir / "cross_kv.onnx", threads), _session(out_dir / "decoder.onnx", threads),
+                          dims.n_text_layer, dims.n_text_head, dims.n_text_state)
+    return OnnxWhisper(dims, encoder, decoder), cached
@@ -0,0 +1,185 @@
+# 音檔長度偵測：只讀檔頭（WAV / MP3 / MP4 / M4A），讀不到時才用 ffprobe；
+# 結果依路徑 + 大小 + 修改時間快取，資料夾批次可平行偵測
+import os
+import json
+import struct
+import shutil
+import threading
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from transcript_cache import DEFAULT_CACHE_DIR
+
+DURATION_CACHE_NAME = "durations.json"
+MAX_CACHE_ENTRIES = 50000
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+# MPEG audio Layer III 位元率（kbps）與取樣率表
+_MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],  # MPEG-1
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],      # MPEG-2 / 2.5
+}
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+def _mp3_duration(path):
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(10)
+        start = 0
+        if head[:3] == b"ID3" and len(head) == 10:
+            start = 10 + ((head[6] & 0x7f) << 21 | (head[7] & 0x7f) << 14 | (head[8] & 0x7f) << 7 | (head[9] & 0x7f))
+            if head[5] & 0x10:
+                start += 10
+        f.seek(start)
+        buf = f.read(64 * 1024)
+        has_id3v1 = False
+        if size >= 128:
+            f.seek(-128, os.SEEK_END)
+            has_id3v1 = f.read(3) == b"TAG"
+
+    for i in range(len(buf) - 4):
+        if buf[i] != 0xff or buf[i + 1] & 0xe0 != 0xe0:
+            continue
+        version_bits = (buf[i + 1] >> 3) & 0x3
+        layer_bits = (buf[i + 1] >> 1) & 0x3
+        bitrate_index = buf[i + 2] >> 4
+        rate_index = (buf[i + 2] >> 2) & 0x3
+        if version_bits == 1 or layer_bits != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            continue  # 只處理 Layer III 的有效 frame header
+        mpeg1 = version_bits == 3
+        sample_rate = _MP3_SAMPLE_RATES[version_bits][rate_index]
+        samples_per_frame = 1152 if mpeg1 else 576
+        mono = (buf[i + 3] >> 6) == 3
+        side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+
+        # VBR：Xing / Info 或 VBRI 標頭記錄總 frame 數
+        xing = i + 4 + side_info
+        if buf[xing:xing + 4] in (b"Xing", b"Info"):
+            flags = struct.unpack(">I", buf[xing + 4:xing + 8])[0]
+            if flags & 1:
+                frames = struct.unpack(">I", buf[xing + 8:xing + 12])[0]
+                return frames * samples_per_frame / sample_rate
+        vbri = i + 4 + 32
+        if buf[vbri:vbri + 4] == b"VBRI":
+            frames = struct.unpack(">I", buf[vbri + 14:vbri + 18])[0]
+            return frames * samples_per_frame / sample_rate
+
+        # CBR：以檔案大小與位元率估算
+        bitrate = _MP3_BITRATES[1 if mpeg1 else 2][bitrate_index] * 1000
+        audio_bytes = size - (start + i) - (128 if has_id3v1 else 0)
+        return audio_bytes * 8 / bitrate
+    return None
+
+def _mp4_duration(path):
+    # 依 box 大小跳過 mdat 等大區塊，只讀 moov/mvhd 的 timescale 與 duration
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        def boxes(start, end):
+            pos = start
+            while pos + 8 <= end:
+                f.seek(pos)
+                box_size, box_type = struct.unpack(">I4s", f.read(8))
+                header = 8
+                if box_size == 1:
+                    box_size = struct.unpack(">Q", f.read(8))[0]
+                    header = 16
+                elif box_size == 0:
+                    box_size = end - pos
+                if box_size < header:
+                    return
+                yield box_type, pos + header, pos + box_size
+                pos += box_size
+
+        for box_type, body, end in boxes(0, size):
+            if box_type != b"moov":
+                continue
+            for sub_type, sub_body, _ in boxes(body, end):
+                if sub_type != b"mvhd":
+                    continue
+                f.seek(sub_body)
+                version = f.read(4)[0]
+                if version == 1:
+                    _, _, timescale, duration = struct.unpack(">QQIQ", f.read(28))
+                else:
+                    _, _, timescale, duration = struct.unpack(">IIII", f.read(16))
+                return duration / timescale if timescale else None
+    return None
+
+def _soundfile_duration(path):
+    import soundfile as sf
+    info = sf.info(str(path))
+    return info.frames / info.samplerate
+
+def _ffprobe_duration(path):
+    ffprobe = shutil.which("ffprobe")
+    if ffprobe is None:
+        return None
+    out = subprocess.run([ffprobe, "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", str(path)],
+                         capture_output=True, text=True, timeout=30).stdout.strip()
+    return float(out) if out and out != "N/A" else None
+
+_PARSERS = {".mp3": _mp3_duration, ".mp4": _mp4_duration, ".m4a": _mp4_duration}
+
+def _cache_key(path):
+    st = os.stat(path)
+    return f"{Path(path).resolve()}|{st.st_size}|{st.st_mtime_ns}"
+
+def _probe_uncached(path):
+    parsers = [_PARSERS[Path(path).suffix.lower()]] if Path(path).suffix.lower() in _PARSERS else []
+    for parser in parsers + [_soundfile_duration, _ffprobe_duration]:
+        try:
+            duration = parser(path)
+        except Exception:
+            continue
+        if duration and duration > 0:
+            return duration
+    return None
+
+def probe_duration(path):
+    # 回傳秒數；無法判斷時回傳 None
+    try:
+        key = _cache_key(path)
+    except OSError:
+        return None
+    with _memo_lock:
+        if key in _memo:
+            return _memo[key]
+    duration = _probe_uncached(path)
+    with _memo_lock:
+        _memo[key] = duration
+    return duration
+
+def probe_durations(paths, workers=8, cache_dir=DEFAULT_CACHE_DIR):
+    # 資料夾批次：先載入磁碟快取，平行偵測其餘檔案，再寫回快取
+    cache_path = Path(cache_dir) / DURATION_CACHE_NAME if cache_dir else None
+    if cache_path is not None:
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                stored = json.load(f)
+            with _memo_lock:
+                for k, v in stored.items():
+                    _memo.setdefault(k, v)
+        except (OSError, ValueError):
+            stored = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        durations = dict(zip(paths, ex.map(probe_duration, paths)))
+
+    if cache_path is not None:
+        with _memo_lock:
+            found = {k: v for k, v in _memo.items() if v is not None}
+        if len(found) > MAX_CACHE_ENTRIES:
+            found = dict(list(found.items())[-MAX_CACHE_ENTRIES:])
+        if found != stored:
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = cache_path.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(found, f, ensure_ascii=False)
+                os.replace(tmp, cache_path)
+            except OSError:
+                pass
+    return durations
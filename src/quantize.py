@@ -0,0 +1,54 @@
+# 動態 int8 量化（CPU）：Linear 層權重轉成 int8，activation 在推論時才動態量化；
+# 量化後的模型存到快取資料夾，之後直接載入，不必再讀 fp32 權重與重新量化
+import os
+import warnings
+from pathlib import Path
+
+from transcript_cache import DEFAULT_CACHE_DIR
+
+QUANTIZED_DIR_NAME = "quantized"
+
+def quantize_linear(model):
+    import torch
+    from whisper.model import Linear
+    # whisper 的 Linear 是 nn.Linear 子類別（只多了依輸入轉換 dtype，CPU fp32 下沒有差別），
+    # quantize_dynamic 只替換型別完全相同的 nn.Linear
+    for module in model.modules():
+        if type(module) is Linear:
+            module.__class__ = torch.nn.Linear
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # torch.ao 量化 API 的棄用提示
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+def quantized_path(model_choice, cache_dir=DEFAULT_CACHE_DIR):
+    # torch / whisper 版本不同時序列化格式可能不相容，版本寫在檔名裡
+    import torch
+    import whisper
+    name = f"{model_choice}-int8-torch{torch.__version__}-whisper{whisper.__version__}.pt"
+    return Path(cache_dir) / QUANTIZED_DIR_NAME / name.replace("+", "_")
+
+def load_quantized(model_choice, cache_dir=DEFAULT_CACHE_DIR, loader=None):
+    # 回傳 (模型, 是否來自快取)；loader 預設為 whisper.load_model
+    import torch
+    path = quantized_path(model_choice, cache_dir) if cache_dir else None
+    if path is not None and path.exists():
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                return torch.load(path, map_location="cpu", weights_only=False), True
+        except Exception:
+            pass  # 快取損毀：重新量化並覆寫
+
+    if loader is None:
+        import whisper
+        loader = whisper.load_model
+    model = quantize_linear(loader(model_choice, device="cpu"))
+    if path is not None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            torch.save(model, tmp)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+    return model, False
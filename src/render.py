@@ -0,0 +1,73 @@
+# 輸出格式渲染：一次走訪所有段落，產生 SRT / TXT / MD / JSON / segments-only JSON / VTT
+import json
+from datetime import timedelta
+
+def format_timestamp(seconds, for_vtt=False):
+    td = timedelta(seconds=float(seconds))
+    ts = str(td)
+    if "." not in ts:
+        ts += ".000"
+    else:
+        ts = ts[:-3]
+    return ts if for_vtt else ts.replace(".", ",")
+
+def format_timestamps(seconds):
+    # 向量化版 format_timestamp：回傳 (SRT 格式, VTT 格式) 兩個字串 list
+    import numpy as np
+    # 進位方式與 timedelta(seconds=float) 相同：整數秒 + 小數部分四捨六入五成雙到微秒，再截到毫秒
+    secs = np.asarray(seconds, dtype=np.float64)
+    whole = np.trunc(secs)
+    us = whole.astype(np.int64) * 1_000_000 + np.rint((secs - whole) * 1e6).astype(np.int64)
+    total_s, frac_us = np.divmod(us, 1_000_000)
+    hours, rem = np.divmod(total_s, 3600)
+    minutes, sec = np.divmod(rem, 60)
+    ms = frac_us // 1000
+
+    srt, vtt = [], []
+    in_range = (secs >= 0) & (secs < 86400)
+    for ok, s, h, m, sc, f in zip(in_range.tolist(), secs.tolist(), hours.tolist(), minutes.tolist(),
+                                  sec.tolist(), ms.tolist()):
+        if not ok:
+            # 負值或超過一天時 timedelta 字串格式不同，退回逐一轉換
+            srt.append(format_timestamp(s))
+            vtt.append(format_timestamp(s, for_vtt=True))
+            continue
+        base = f"{h}:{m:02d}:{sc:02d}"
+        srt.append(f"{base},{f:03d}")
+        vtt.append(f"{base}.{f:03d}")
+    return srt, vtt
+
+def render_outputs(result, texts, title):
+    # texts 為已轉換（繁體、去頭尾空白）的段落文字，與 result["segments"] 一一對應
+    # 回傳 [(檔名後綴, 內容), ...]，順序與舊版 zip 內容一致
+    segments = result["segments"]
+    n = len(segments)
+    srt_ts, vtt_ts = format_timestamps([seg["start"] for seg in segments] + [seg["end"] for seg in segments])
+
+    srt_parts, txt_parts, vtt_parts = [], [], ["WEBVTT\n\n"]
+    md_lines = [f"# 語音筆記：{title}\n"]
+    for i, (seg, text) in enumerate(zip(segments, texts)):
+        start, end = srt_ts[i], srt_ts[n + i]
+        srt_parts.append(f"{i + 1}\n{start} --> {end}\n{text}\n\n")
+        vtt_parts.append(f"{vtt_ts[i]} --> {vtt_ts[n + i]}\n{text}\n\n")
+        if seg["text"].strip():
+            txt_parts.append(text)
+        if text:
+            md_lines.append(f"## [{start} – {end}]\n{text}\n")
+
+    result_converted = {
+        key: [dict(seg, text=text) if "text" in seg else seg for seg, text in zip(val, texts)]
+        if key == "segments" else val
+        for key, val in result.items()
+    }
+    segments_only = {"segments": [{"start": seg["start"], "end": seg["end"], "text": text}
+                                  for seg, text in zip(segments, texts)]}
+
+    return [
+        (".srt", "".join(srt_parts)),
+        (".txt", "\n\n".join(txt_parts)),
+        (".md", "\n".join(md_lines)),
+        (".json", json.dumps(result_converted, ensure_ascii=False, indent=2)),
+        ("_segments_only.json", json.dumps(segments_only, ensure_ascii=False, indent=2)),
+        (".vtt", "".join(vtt_parts)),
+    ]
@@ -0,0 +1,1237 @@
+import os
+import re
+import zipfile
+from pathlib import Path
+from tqdm import tqdm
+from render import render_outputs
+from transcript_cache import TranscriptCache, DEFAULT_CACHE_DIR
+from job_ledger import JobLedger, LEDGER_NAME
+from transcribe_service import ModelLRU, serve, service_url, service_available, submit_job, DEFAULT_PORT
+from probe import probe_duration, probe_durations
+from folder_watch import FolderWatcher
+from discovery import MediaDiscovery, MEDIA_EXTS
+from engines import ENGINES, ONNX_REQUIREMENT, check_engine, engine_device, load_engine
+from cpu_optimize import PRECISIONS, optimize_cpu_model, resolve_precision, describe as describe_cpu_opt
+from audio_decode import load_audio
+from streaming_mel import StreamingMel, STREAM_MEMORY_SEC
+from thread_budget import auto_workers, plan_threads, apply_threads
+from memory_budget import (AudioAdmission, audio_memory_mb, available_memory_mb, fit_model, fit_workers,
+                           gpu_free_memory_mb, model_memory_mb, gb, HEADROOM)
+from scheduler import ORDERS, order_paths, simulate_makespan, makespan_lower_bound
+from metrics import METRICS, METRICS_LOG_NAME, load_run, summarize, print_summary, write_prometheus
+import argparse
+import sys
+import time
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing as mp
+
+_cc = None  # 簡體轉繁體（第一次轉換時才載入 OpenCC 詞典）
+
+def get_converter():
+    global _cc
+    if _cc is None:
+        from opencc import OpenCC
+        _cc = OpenCC('s2t')
+    return _cc
+
+# OpenCC 詞典只收錄漢字（含「〇」），不含漢字的文字轉換前後相同，可直接略過
+_CJK_RE = re.compile(r'[\u3007\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\U00020000-\U0003134f]')
+_convert_memo = {}
+
+def convert_segments(segments, language=None):
+    # 每個結果只轉換一次：所有段落文字合併成一次 OpenCC 呼叫，重複句子走快取
+    texts = [seg["text"].strip() for seg in segments]
+    if language in ("English", "en"):
+        return texts
+    todo = [t for t in dict.fromkeys(texts) if t not in _convert_memo and _CJK_RE.search(t)]
+    if todo:
+        cc = get_converter()
+        if any("\n" in t for t in todo):
+            converted = [cc.convert(t) for t in todo]
+        else:
+            converted = cc.convert("\n".join(todo)).split("\n")
+        if len(_convert_memo) > 100000:
+            _convert_memo.clear()
+        _convert_memo.update(zip(todo, converted))
+    return [_convert_memo.get(t, t) for t in texts]
+
+def sanitize_filename(name):
+    return re.sub(r'[\\/:*?"<>|]', "_", name)
+
+def output_zip_name(input_path, model_choice):
+    return f"{sanitize_filename(Path(input_path).stem)}({model_choice}).zip"
+
+def find_existing_outputs(discovery, paths, model_choice):
+    # 以搜尋時建立的 zip 索引比對，不逐檔呼叫 exists()
+    existing = []
+    for p in paths:
+        name = output_zip_name(p, model_choice)
+        if discovery.has_output(p, name):
+            existing.append(name)
+    return existing
+
+def get_unique_zip_path(base_path):
+    if not base_path.exists():
+        return base_path
+    i = 2
+    while True:
+        new_path = base_path.with_name(f"{base_path.stem}({i}){base_path.suffix}")
+        if not new_path.exists():
+            return new_path
+        i += 1
+
+# zip 壓縮設定：--zip-store 不壓縮（最快），--zip-level 0-9 調整 deflate 等級
+ZIP_OPTIONS = {"compression": zipfile.ZIP_DEFLATED, "compresslevel": None}
+
+def set_zip_options(store=False, level=None):
+    ZIP_OPTIONS["compression"] = zipfile.ZIP_STORED if store else zipfile.ZIP_DEFLATED
+    ZIP_OPTIONS["compresslevel"] = None if store else level
+
+# 串流解碼：--stream-audio 時整檔推論分段讀取 ffmpeg 輸出、逐段計算 log-mel，記憶體用量不隨音訊長度增加
+# （VAD 與 --chunk-minutes 切段需要整段音訊，仍先完整解碼）
+AUDIO_OPTIONS = {"stream": False}
+
+def open_unique_zip(base_path):
+    # 以獨佔模式建立，多個 worker 同時輸出同名檔案時不會互相覆蓋
+    while True:
+        zip_path = get_unique_zip_path(base_path)
+        try:
+            return zipfile.ZipFile(zip_path, "x", **ZIP_OPTIONS), zip_path
+        except FileExistsError:
+            continue
+
+def check_duration(input_path, audio=None):
+    filename_raw = Path(input_path).stem
+    # 音訊長度警告：已解碼的 PCM 直接用樣本數計算，否則只讀檔頭（結果有快取）
+    if audio is not None:
+        import whisper
+        duration_sec = len(audio) / whisper.audio.SAMPLE_RATE
+    else:
+        with METRICS.stage("probe"):
+            duration_sec = probe_duration(input_path)
+    if duration_sec is None:
+        print(f"⚠️ 無法檢測長度（可能非純音訊格式）：{filename_raw}\n")
+    elif duration_sec > 3600:
+        print(f"⚠️ 音訊長度超過 60 分鐘：{filename_raw}，建議使用 large-v2 模型以提高準確度。\n")
+    return duration_sec
+
+# 批次進度條：知道各檔長度時以音訊秒數計算進度與 ETA（長度不明的檔案以平均長度估計），否則以檔案數計算
+class AudioProgress:
+    def __init__(self, input_paths, durations=None, desc="批次處理中"):
+        if not isinstance(input_paths, (list, tuple)):
+            # 邊搜尋邊處理：總數未知，只顯示已處理的檔案數
+            self.weights = None
+            self.bar = tqdm(desc=desc, ncols=80, unit="檔")
+            return
+        known = [durations[p] for p in input_paths if durations and durations.get(p)]
+        disable = len(input_paths) <= 1
+        if known:
+            average = sum(known) / len(known)
+            self.weights = {p: durations.get(p) or average for p in input_paths}
+            self.bar = tqdm(total=round(sum(self.weights.values()), 1), desc=desc, ncols=80, unit="s",
+                            bar_format="{l_bar}{bar}| {n:.0f}/{total:.0f}s [{elapsed}<{remaining}, {rate_fmt}]",
+                            disable=disable)
+        else:
+            self.weights = None
+            self.bar = tqdm(total=len(input_paths), desc=desc, ncols=80, disable=disable)
+
+    def advance(self, p):
+        self.bar.update(self.weights[p] if self.weights else 1)
+
+    def close(self):
+        self.bar.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def run_model(model, audio, language, verbose=True, vad=False):
+    import whisper
+    from vad import speech_clip_timestamps
+    if isinstance(audio, str) and AUDIO_OPTIONS["stream"] and not vad:
+        return run_model_streaming(model, audio, language, verbose)
+    if isinstance(audio, str):
+        with METRICS.stage("decode"):
+            audio = load_audio(audio)
+    METRICS.note(audio_sec=len(audio) / whisper.audio.SAMPLE_RATE)
+    METRICS.attach(model)
+    # CPU 不支援 fp16，明確指定 fp32，避免 whisper 每個檔案都警告一次再自行退回
+    fp16 = model.device.type == "cuda"
+    if not vad:
+        with METRICS.stage("infer"):
+            return model.transcribe(audio, language=language, verbose=verbose, fp16=fp16)
+    # VAD 前處理：只把語音區段交給模型，時間戳仍對應原始時間軸
+    with METRICS.stage("vad"):
+        clips = speech_clip_timestamps(audio)
+    if verbose:
+        speech_sec = sum(clips[1::2]) - sum(clips[0::2])
+        total_sec = len(audio) / whisper.audio.SAMPLE_RATE
+        print(f"🔇 VAD：保留語音 {speech_sec:.1f} / {total_sec:.1f} 秒")
+    if not clips:
+        return {"text": "", "segments": [], "language": language}
+    with METRICS.stage("infer"):
+        return model.transcribe(audio, language=language, verbose=verbose, fp16=fp16, clip_timestamps=clips)
+
+def run_model_streaming(model, input_path, language, verbose=True):
+    # 第一遍讀完整個檔案算出 log-mel 的最大值與長度（計入解碼），第二遍在推論時隨解碼迴圈逐段讀取
+    with METRICS.stage("decode"):
+        mel = StreamingMel(input_path, model.dims.n_mels)
+    METRICS.note(audio_sec=mel.duration)
+    METRICS.attach(model)
+    with METRICS.stage("infer"), mel:
+        return model.transcribe(mel, language=language, verbose=verbose, fp16=model.device.type == "cuda")
+
+# 快取鍵的推論設定：int8 量化、ONNX 引擎、bf16 encoder 的轉錄結果與預設的 torch fp32 不同，分開快取；
+# 預設設定不加欄位，既有的快取仍然有效
+CACHE_OPTIONS = {}
+
+def set_cache_options(device, quantize=False, engine="torch", cpu_opt=None):
+    CACHE_OPTIONS.clear()
+    if engine != "torch":
+        CACHE_OPTIONS["engine"] = engine
+    elif device == "cpu" and quantize:
+        CACHE_OPTIONS["quantize"] = "int8"  # 量化模型的 --cpu-opt 維持 fp32
+    elif device == "cpu" and cpu_opt and resolve_precision(cpu_opt["precision"]) == "bf16":
+        CACHE_OPTIONS["precision"] = "bf16"
+
+def cache_lookup(cache, input_path, model_choice, language, vad=False, **options):
+    if cache is None:
+        return None, None
+    with METRICS.stage("cache"):
+        key = cache.key(input_path, model_choice, language, vad=vad, **CACHE_OPTIONS, **options)
+        result = cache.get(key)
+    if result is not None:
+        METRICS.count("cache_hits")
+        tqdm.write(f"♻️ 快取命中，跳過推論：{Path(input_path).name}")
+    return key, result
+
+def cache_store(cache, key, result):
+    if cache is None or key is None:
+        return
+    try:
+        with METRICS.stage("cache"):
+            cache.put(key, result)
+    except OSError as e:
+        tqdm.write(f"⚠️ 無法寫入快取：{e}")
+
+def transcribe_file(input_path, language, model, parent_folder, model_choice, verbose=True, audio=None, vad=False, cache=None):
+    key, result = cache_lookup(cache, input_path, model_choice, language, vad)
+    if result is None:
+        check_duration(input_path, audio)
+        result = run_model(model, input_path if audio is None else audio, language, verbose, vad)
+        cache_store(cache, key, result)
+    return save_outputs(result, input_path, parent_folder, model_choice)
+
+def save_outputs(result, input_path, parent_folder, model_choice):
+    filename_raw = Path(input_path).stem
+    filename_stem = sanitize_filename(filename_raw) + f"({model_choice})"
+    with METRICS.stage("opencc"):
+        texts = convert_segments(result["segments"], result.get("language"))
+    with METRICS.stage("render"):
+        outputs = render_outputs(result, texts, filename_raw)
+
+    zipf, zip_path = open_unique_zip(parent_folder / f"{filename_stem}.zip")
+    with METRICS.stage("zip"), zipf:
+        for suffix, content in outputs:
+            # 直接寫入 zip，換行與舊版文字模式寫檔一致（Windows 為 CRLF）
+            zipf.writestr(f"{filename_stem}{suffix}", content.replace("\n", os.linesep).encode("utf-8"))
+
+    print(f"✅ 完成：{zip_path}")
+    return zip_path
+
+# 批次工作狀態：失敗訊息統一輸出，並同步寫入工作紀錄（若有）
+def job_started(ledger, p):
+    if ledger is not None:
+        ledger.mark_running(p)
+
+def job_done(ledger, p, zip_path):
+    METRICS.finish(p, "done", output=str(zip_path))
+    if ledger is not None:
+        ledger.mark_done(p, zip_path)
+
+def job_failed(failed, p, e, ledger=None):
+    failed.append(p)
+    tqdm.write(f"❌ 轉換失敗：{p.name} ({e})")
+    METRICS.finish(p, "failed", error=str(e))
+    if ledger is not None:
+        ledger.mark_failed(p, e)
+
+def report_failures(failed):
+    if failed:
+        print(f"⚠️ 共 {len(failed)} 個檔案失敗：")
+        for p in failed:
+            print("   -", p.name)
+
+# 管線批次：解碼 → 推論 → 打包 三段重疊執行，佇列有上限以控制記憶體
+_PIPELINE_END = object()
+
+def run_pipelined_batch(input_paths, language, model, model_choice, prefetch, vad=False, cache=None, ledger=None, durations=None):
+    decoded_q = queue.Queue(maxsize=prefetch)
+    result_q = queue.Queue(maxsize=prefetch)
+    failed = []
+
+    def decode_stage():
+        for p in input_paths:
+            try:
+                with METRICS.current(p):
+                    key, result = cache_lookup(cache, str(p), model_choice, language, vad)
+                    if result is not None:
+                        result_q.put((p, result))
+                        continue
+                    with METRICS.stage("decode"):
+                        audio = load_audio(str(p))
+                decoded_q.put((p, audio, key, None))
+            except Exception as e:
+                decoded_q.put((p, None, None, e))
+        decoded_q.put(_PIPELINE_END)
+
+    def package_stage(bar):
+        while True:
+            item = result_q.get()
+            if item is _PIPELINE_END:
+                break
+            p, result = item
+            try:
+                with METRICS.current(p):
+                    zip_path = save_outputs(result, str(p), p.parent, model_choice)
+                job_done(ledger, p, zip_path)
+            except Exception as e:
+                job_failed(failed, p, e, ledger)
+            bar.advance(p)
+
+    with AudioProgress(input_paths, durations) as bar:
+        decoder = threading.Thread(target=decode_stage, daemon=True)
+        packager = threading.Thread(target=package_stage, args=(bar,), daemon=True)
+        decoder.start()
+        packager.start()
+        while True:
+            item = decoded_q.get()
+            if item is _PIPELINE_END:
+                break
+            p, audio, key, err = item
+            if err is None:
+                try:
+                    # 預先解碼的檔案還在排隊，輪到推論時才記為執行中
+                    job_started(ledger, p)
+                    with METRICS.current(p):
+                        check_duration(str(p), audio)
+                        result = run_model(model, audio, language, True, vad)
+                        cache_store(cache, key, result)
+                    result_q.put((p, result))
+                    continue
+                except Exception as e:
+                    err = e
+            job_failed(failed, p, err, ledger)
+            bar.advance(p)
+        result_q.put(_PIPELINE_END)
+        packager.join()
+    report_failures(failed)
+    return failed
+
+# 短音檔打包：多個 ≤30 秒的短檔共用一次 batch 編碼與解碼，再依時間戳拆回各檔
+def _needs_fallback(r, timestamp_begin):
+    if r.no_speech_prob > 0.6 and r.avg_logprob < -1.0:
+        return False  # 靜音
+    return r.compression_ratio > 2.4 or r.avg_logprob < -1.0 or _unfinished_tail(r.tokens, timestamp_begin)
+
+def _unfinished_tail(tokens, timestamp_begin):
+    # 有成對時間戳、但最後不是時間戳：最後一對之後的文字沒有結束時間，
+    # model.transcribe 會從最後的時間戳接著解碼下一個視窗，打包結果無法拆出這段
+    is_timestamp = [t >= timestamp_begin for t in tokens]
+    paired = any(a and b for a, b in zip(is_timestamp, is_timestamp[1:]))
+    return paired and not is_timestamp[-1]
+
+def _split_segments(r, tokenizer, duration, time_precision):
+    import torch
+    tokens = torch.tensor(r.tokens)
+    timestamp_tokens = tokens.ge(tokenizer.timestamp_begin)
+    single_timestamp_ending = timestamp_tokens[-2:].tolist() == [False, True]
+    consecutive = torch.where(timestamp_tokens[:-1] & timestamp_tokens[1:])[0] + 1
+
+    spans = []
+    if len(consecutive) > 0:
+        slices = consecutive.tolist()
+        if single_timestamp_ending:
+            slices.append(len(tokens))
+        last_slice = 0
+        for current_slice in slices:
+            sliced = tokens[last_slice:current_slice]
+            start = (sliced[0].item() - tokenizer.timestamp_begin) * time_precision
+            end = (sliced[-1].item() - tokenizer.timestamp_begin) * time_precision
+            spans.append((start, end, sliced))
+            last_slice = current_slice
+    else:
+        end = duration
+        timestamps = tokens[timestamp_tokens.nonzero().flatten()]
+        if len(timestamps) > 0 and timestamps[-1].item() != tokenizer.timestamp_begin:
+            end = (timestamps[-1].item() - tokenizer.timestamp_begin) * time_precision
+        spans.append((0.0, end, tokens))
+
+    segments = []
+    for i, (start, end, seg_tokens) in enumerate(spans):
+        seg_tokens = seg_tokens.tolist()
+        text = tokenizer.decode([t for t in seg_tokens if t < tokenizer.eot])
+        if start == end or not text.strip():
+            text, seg_tokens = "", []
+        segments.append({
+            "id": i, "seek": 0, "start": start, "end": end, "text": text, "tokens": seg_tokens,
+            "temperature": r.temperature, "avg_logprob": r.avg_logprob,
+            "compression_ratio": r.compression_ratio, "no_speech_prob": r.no_speech_prob,
+        })
+    return segments
+
+def transcribe_short_batch(model, audios, language):
+    import torch
+    import whisper
+    METRICS.attach(model)
+    dtype = torch.float16 if model.device.type == "cuda" else torch.float32
+    with METRICS.stage("infer.log_mel"):
+        mel = torch.stack([whisper.log_mel_spectrogram(whisper.pad_or_trim(a), model.dims.n_mels) for a in audios])
+    options = whisper.DecodingOptions(language=language, fp16=dtype == torch.float16)
+    # 經由 model.decode：--metrics 的 decode 計數與 --cpu-opt 的 inference mode 都掛在這裡
+    with METRICS.stage("infer.decode"):
+        decoded = model.decode(mel.to(model.device).to(dtype), options)
+
+    tokenizer = whisper.tokenizer.get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                                language=language, task="transcribe")
+    time_precision = whisper.audio.N_FRAMES // model.dims.n_audio_ctx * whisper.audio.HOP_LENGTH / whisper.audio.SAMPLE_RATE
+    results = []
+    for audio, r in zip(audios, decoded):
+        if _needs_fallback(r, tokenizer.timestamp_begin):
+            # 品質不佳時退回逐檔轉錄（含溫度回退）
+            results.append(model.transcribe(audio, language=language, verbose=None, fp16=dtype == torch.float16))
+            continue
+        if r.no_speech_prob > 0.6 and r.avg_logprob < -1.0:
+            segments = []
+        else:
+            segments = _split_segments(r, tokenizer, len(audio) / whisper.audio.SAMPLE_RATE, time_precision)
+        all_tokens = [t for seg in segments for t in seg["tokens"]]
+        results.append({"text": tokenizer.decode(all_tokens), "segments": segments, "language": language})
+    return results
+
+def run_packed_batch(input_paths, language, model, model_choice, pack_size, vad=False, cache=None, ledger=None, durations=None):
+    import whisper
+    failed = []
+    pending = []
+
+    def flush(bar):
+        if not pending:
+            return
+        for p, _, _ in pending:
+            job_started(ledger, p)
+        try:
+            with METRICS.current([p for p, _, _ in pending]), METRICS.stage("infer"):
+                results = transcribe_short_batch(model, [a for _, _, a in pending], language)
+        except Exception as e:
+            for p, _, _ in pending:
+                job_failed(failed, p, e, ledger)
+            for p, _, _ in pending:
+                bar.advance(p)
+            pending.clear()
+            return
+        for (p, key, _), result in zip(pending, results):
+            try:
+                with METRICS.current(p):
+                    cache_store(cache, key, result)
+                    zip_path = save_outputs(result, str(p), p.parent, model_choice)
+                job_done(ledger, p, zip_path)
+            except Exception as e:
+                job_failed(failed, p, e, ledger)
+            bar.advance(p)
+        pending.clear()
+
+    with AudioProgress(input_paths, durations) as bar:
+        for p in input_paths:
+            try:
+                with METRICS.current(p):
+                    key, result = cache_lookup(cache, str(p), model_choice, language, vad)
+                    if result is None:
+                        with METRICS.stage("decode"):
+                            audio = load_audio(str(p))
+                        # --vad 時短檔也逐檔轉錄（打包推論不跑 VAD）
+                        if len(audio) <= whisper.audio.N_SAMPLES and not vad:
+                            # 打包推論只解碼一個視窗，結果另存一個快取鍵，之後的一般轉錄不會取用
+                            key, result = cache_lookup(cache, str(p), model_choice, language, packed=True)
+                            if result is None:
+                                METRICS.note(audio_sec=len(audio) / whisper.audio.SAMPLE_RATE)
+                                pending.append((p, key, audio))
+                                if len(pending) >= pack_size:
+                                    flush(bar)
+                                continue
+                        else:
+                            job_started(ledger, p)
+                            check_duration(str(p), audio)
+                            result = run_model(model, audio, language, True, vad)
+                            cache_store(cache, key, result)
+                    zip_path = save_outputs(result, str(p), p.parent, model_choice)
+                job_done(ledger, p, zip_path)
+            except Exception as e:
+                job_failed(failed, p, e, ledger)
+            bar.advance(p)
+        flush(bar)
+    report_failures(failed)
+    return failed
+
+# 多行程批次：每個 worker 只載入一次模型，從共用佇列取檔
+_worker_model = None
+_worker_args = None
+_worker_ledger = None
+
+def _init_worker(model_choice, device, language, threads, vad=False, cache=None, zip_options=None, metrics=None, quantize=False, engine="torch", cpu_opt=None, audio_options=None, cache_dir=DEFAULT_CACHE_DIR, ledger_args=None):
+    global _worker_model, _worker_args, _worker_ledger
+    if zip_options:
+        ZIP_OPTIONS.update(zip_options)
+    if audio_options:
+        AUDIO_OPTIONS.update(audio_options)
+    if metrics:
+        METRICS.enable(*metrics)
+    apply_threads(threads)
+    set_cache_options(device, quantize, engine, cpu_opt)
+    _worker_model = load_model(model_choice, device, quantize, engine, cpu_opt, cache_dir)
+    _worker_args = (language, model_choice, vad, cache)
+    # 工作紀錄：worker 取到檔案時自行記為執行中，排隊中的檔案維持待處理
+    _worker_ledger = JobLedger(*ledger_args) if ledger_args else None
+
+def _worker_transcribe(input_path, audio=None):
+    language, model_choice, vad, cache = _worker_args
+    p = Path(input_path)
+    job_started(_worker_ledger, p)
+    # 效能紀錄在 worker 內寫入；主行程的 job_done 找不到此檔紀錄時不會重複寫
+    try:
+        with METRICS.current(p):
+            zip_path = transcribe_file(str(p), language, _worker_model, p.parent, model_choice, verbose=None, audio=audio, vad=vad, cache=cache)
+    except Exception as e:
+        METRICS.finish(p, "failed", error=str(e))
+        raise
+    METRICS.finish(p, "done", output=str(zip_path))
+    return zip_path
+
+def _worker_transcribe_chunk(audio, input_path=None):
+    language, _, vad, _ = _worker_args
+    with METRICS.current(f"{input_path}#chunk"):
+        result = run_model(_worker_model, audio, language, None, vad)
+    METRICS.finish(f"{input_path}#chunk", "partial", source=str(input_path))
+    return result
+
+# 長音檔切段：在靜音處切開、前後重疊 CHUNK_OVERLAP_SEC 秒，平行轉錄後再接回
+CHUNK_OVERLAP_SEC = 2.0
+
+def split_long_audio(audio, chunk_sec, overlap=CHUNK_OVERLAP_SEC):
+    import whisper
+    from vad import find_split_points
+    sr = whisper.audio.SAMPLE_RATE
+    cuts = [0.0] + find_split_points(audio, chunk_sec, sr) + [len(audio) / sr]
+    chunks = []
+    for i in range(len(cuts) - 1):
+        start = max(0.0, cuts[i] - overlap) if i else 0.0
+        chunks.append((start, cuts[i], audio[int(start * sr):int(cuts[i + 1] * sr)]))
+    return chunks
+
+def stitch_chunks(results, offsets, cuts):
+    import whisper
+    segments = []
+    for i, (result, offset) in enumerate(zip(results, offsets)):
+        for seg in result["segments"]:
+            seg = dict(seg, start=seg["start"] + offset, end=seg["end"] + offset,
+                       seek=seg["seek"] + round(offset * whisper.audio.FRAMES_PER_SECOND))
+            # 重疊區已由前一段輸出
+            if i and (seg["start"] + seg["end"]) / 2 < cuts[i]:
+                continue
+            text = seg["text"].strip()
+            if segments and text and text == segments[-1]["text"].strip() and seg["start"] < segments[-1]["end"] + 1.0:
+                continue
+            segments.append(seg)
+    for i, seg in enumerate(segments):
+        seg["id"] = i
+    return {"text": "".join(seg["text"] for seg in segments), "segments": segments,
+            "language": results[0]["language"] if results else None}
+
+def run_parallel_batch(input_paths, language, model_choice, device, workers, vad=False, chunk_sec=0, cache=None, ledger=None, durations=None, quantize=False, engine="torch", cpu_opt=None, budget=None, audio_budget=None, cache_dir=DEFAULT_CACHE_DIR):
+    import whisper
+    budget = budget or plan_threads(workers)
+    print(f"平行批次：{workers} 個 worker，每個 {budget.intra_op} 執行緒")
+    failed = []
+    inflight = {}  # future -> (檔案, 段落編號；整檔為 None)
+    reserved = {}  # future -> 預估音訊緩衝（MB）
+    admission = AudioAdmission(audio_budget)
+    chunk_jobs = {}  # 檔案 -> 切段狀態
+    max_inflight = workers * 2
+    ctx = mp.get_context("spawn")
+
+    def fail(p, e):
+        job_failed(failed, p, e, ledger)
+        bar.advance(p)
+
+    def drain():
+        done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+        for fut in done:
+            p, idx = inflight.pop(fut)
+            admission.release(reserved.pop(fut))
+            if idx is None:
+                try:
+                    job_done(ledger, p, fut.result())
+                    bar.advance(p)
+                except Exception as e:
+                    fail(p, e)
+                continue
+            job = chunk_jobs.get(p)
+            if job is None:
+                continue  # 同檔其他段已失敗
+            try:
+                job["results"][idx] = fut.result()
+            except Exception as e:
+                del chunk_jobs[p]
+                fail(p, e)
+                continue
+            if all(r is not None for r in job["results"]):
+                del chunk_jobs[p]
+                try:
+                    with METRICS.current(p):
+                        result = stitch_chunks(job["results"], job["offsets"], job["cuts"])
+                        cache_store(cache, job["key"], result)
+                        zip_path = save_outputs(result, str(p), p.parent, model_choice)
+                    job_done(ledger, p, zip_path)
+                    bar.advance(p)
+                except Exception as e:
+                    fail(p, e)
+
+    def start_pool():
+        return ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                   initargs=(model_choice, device, language, budget.config(), vad, cache, dict(ZIP_OPTIONS),
+                                             METRICS.config(), quantize, engine, cpu_opt, dict(AUDIO_OPTIONS), cache_dir, ledger_args))
+
+    def submit(fn, *fn_args, key, mb=0.0):
+        nonlocal pool
+        # 記憶體不足時排隊：等進行中的檔案完成、釋出音訊緩衝後再送出
+        if not admission.fits(mb):
+            tqdm.write(f"⏳ 記憶體不足，{Path(key[0]).name} 等待其他檔案完成後再開始")
+        while len(inflight) >= max_inflight or not admission.fits(mb):
+            drain()
+        admission.acquire(mb)
+        try:
+            fut = pool.submit(fn, *fn_args)
+        except BrokenProcessPool:
+            # worker 異常結束（如被 OOM 終止）後整個 worker 池無法再使用：
+            # 進行中的檔案都會失敗，收完結果後重建 worker 池，繼續處理其餘檔案
+            while inflight:
+                drain()
+            pool.shutdown(wait=False)
+            tqdm.write("⚠️ worker 異常結束（可能是記憶體不足），重新啟動 worker 後繼續")
+            pool = start_pool()
+            fut = pool.submit(fn, *fn_args)
+        inflight[fut] = key
+        reserved[fut] = mb
+
+    def file_mb(p):
+        if audio_budget is None:
+            return 0.0
+        if AUDIO_OPTIONS["stream"] and not vad:
+            return audio_memory_mb(STREAM_MEMORY_SEC)
+        return audio_memory_mb((durations or {}).get(p) or probe_duration(p))
+
+    ledger_args = (str(ledger.db_path), ledger.model_choice, ledger.language) if ledger is not None else None
+    pool = start_pool()
+    try:
+        with AudioProgress(input_paths, durations) as bar:
+            for p in input_paths:
+                if not chunk_sec:
+                    submit(_worker_transcribe, str(p), key=(p, None), mb=file_mb(p))
+                    continue
+                known = (durations or {}).get(p)
+                if known is not None and known <= chunk_sec * 1.5:
+                    # 不會切段的檔案直接交給 worker，沿用整檔的快取鍵
+                    submit(_worker_transcribe, str(p), key=(p, None), mb=file_mb(p))
+                    continue
+                try:
+                    with METRICS.current(p):
+                        # 切段接回的結果與整檔轉錄不同，快取鍵加上段落長度
+                        key, result = cache_lookup(cache, str(p), model_choice, language, vad, chunk=chunk_sec)
+                        if result is not None:
+                            zip_path = save_outputs(result, str(p), p.parent, model_choice)
+                        else:
+                            with METRICS.stage("decode"):
+                                audio = load_audio(str(p))
+                    if result is not None:
+                        job_done(ledger, p, zip_path)
+                        bar.advance(p)
+                        continue
+                except Exception as e:
+                    fail(p, e)
+                    continue
+                if len(audio) <= chunk_sec * 1.5 * whisper.audio.SAMPLE_RATE:
+                    # 整檔交給 worker：主行程量到的解碼時間另存一筆 partial 紀錄
+                    METRICS.finish(p, "partial")
+                    submit(_worker_transcribe, str(p), audio, key=(p, None), mb=file_mb(p))
+                    continue
+                job_started(ledger, p)  # 切段的檔案由主行程切開、分送各 worker
+                with METRICS.current(p):
+                    METRICS.note(audio_sec=len(audio) / whisper.audio.SAMPLE_RATE)
+                    check_duration(str(p), audio)
+                    with METRICS.stage("split"):
+                        chunks = split_long_audio(audio, chunk_sec)
+                del audio
+                tqdm.write(f"✂️ 切成 {len(chunks)} 段平行轉錄：{p.name}")
+                chunk_jobs[p] = {"key": key, "offsets": [c[0] for c in chunks], "cuts": [c[1] for c in chunks],
+                                 "results": [None] * len(chunks)}
+                for i, (_, _, piece) in enumerate(chunks):
+                    if p not in chunk_jobs:
+                        break  # 前面的段落已失敗
+                    submit(_worker_transcribe_chunk, piece, str(p), key=(p, i),
+                           mb=audio_memory_mb(len(piece) / whisper.audio.SAMPLE_RATE) if audio_budget is not None else 0.0)
+            while inflight:
+                drain()
+    finally:
+        pool.shutdown()
+    report_failures(failed)
+    return failed
+
+# 常駐服務：模型常駐記憶體，命令列偵測到服務時改為送出工作，省去每次載入模型的時間
+def run_service(args):
+    device = resolve_device(args.device)
+    apply_thread_budget(args, device)
+    set_cache_options(engine_device(args.engine, device), args.quantize, args.engine, cpu_opt_options(args))
+    cache = None if args.no_cache else TranscriptCache(args.cache_dir, args.cache_size_mb)
+    models = ModelLRU(lambda name: load_model_logged(name, device, args.quantize, args.engine, cpu_opt_options(args), args.cache_dir), args.max_models)
+    infer_lock = threading.Lock()
+
+    def handle_job(job):
+        input_path = Path(job["input_path"])
+        if not input_path.is_file():
+            raise FileNotFoundError(f"檔案不存在：{input_path}")
+        model_choice = get_model_choice(job.get("model", "base"))
+        model = models.get(model_choice)
+        # 同一時間只跑一個推論，zip 設定依各工作的參數
+        with infer_lock, METRICS.current(input_path):
+            set_zip_options(job.get("zip_store", False), job.get("zip_level"))
+            AUDIO_OPTIONS["stream"] = job.get("stream", False)
+            try:
+                zip_path = transcribe_file(str(input_path), job.get("language", "Chinese"), model, input_path.parent,
+                                           model_choice, verbose=None, vad=job.get("vad", False),
+                                           cache=cache if job.get("cache", True) else None)
+            except Exception as e:
+                METRICS.finish(input_path, "failed", error=str(e))
+                raise
+            METRICS.finish(input_path, "done", output=str(zip_path))
+        return {"zip": str(zip_path)}
+
+    enable_metrics(args, Path.cwd())
+    models.get(get_model_choice(args.model))
+    serve(handle_job, models, port=args.service_port)
+
+def load_model(model_choice, device, quantize=False, engine="torch", cpu_opt=None, cache_dir=DEFAULT_CACHE_DIR):
+    # quantize：CPU 動態 int8 量化；engine="onnx"：匯出 ONNX 以 ONNX Runtime 推論。兩者結果都快取在 cache_dir（--cache-dir），之後直接載入
+    # cpu_opt：{"precision", "compile"}，CPU 的 torch 引擎載入後套用 inference mode / bf16 / 編譯並暖機
+    model, cached = load_engine(engine, model_choice, device, quantize, cache_dir)
+    if not cached and engine == "onnx":
+        print(f"📦 已將 {model_choice} 匯出為 ONNX 並存入快取，下次直接載入")
+    elif not cached:
+        print(f"🗜️ 已量化 {model_choice} 為 int8 並存入快取，下次直接載入")
+    if cpu_opt and device == "cpu" and engine == "torch":
+        model = apply_cpu_opt(model, cpu_opt, quantize)
+    return model
+
+def apply_cpu_opt(model, cpu_opt, quantize=False):
+    # int8 量化的 Linear 不接受 bf16 輸入
+    precision = "fp32" if quantize else cpu_opt["precision"]
+    model, info = optimize_cpu_model(model, precision, cpu_opt.get("compile", False))
+    print(f"⚡ CPU 最佳化：{describe_cpu_opt(info)}")
+    return model
+
+# 記憶體准入控制：載入模型、啟動 worker 前先估計記憶體，放不下時改用較小模型、減少 worker 或讓長檔案排隊
+def admit_model(args, model_choice, use_service=False):
+    # 在建立工作紀錄前決定：工作紀錄與輸出檔名都依實際使用的模型。
+    # 交給轉錄服務時不檢查：模型由服務載入，服務常駐的模型本身就會讓可用記憶體偏低
+    if args.no_memory_check or use_service:
+        return model_choice
+    fitted, note = fit_model(model_choice, available_memory_mb(), args.quantize and args.engine == "torch")
+    if note:
+        print(f"⚠️ {note}（可加 --no-memory-check 略過檢查）")
+    return fitted
+
+def admit_workers(args, model_choice, device, workers, durations, chunk_sec):
+    # 回傳 (worker 數, 平行批次的音訊緩衝預算 MB)；GPU 模式以顯示記憶體限制 worker 數，音訊緩衝仍在主記憶體
+    if args.no_memory_check:
+        return workers, None
+    known = [d for d in (durations or {}).values() if d]
+    typical = chunk_sec * 1.5 if chunk_sec else (sum(known) / len(known) if known else 0)
+    if args.stream_audio and not args.vad and not chunk_sec:
+        known, typical = [], STREAM_MEMORY_SEC  # 串流解碼時每個檔案的音訊緩衝與長度無關
+    model_mb = model_memory_mb(model_choice, args.quantize and device == "cpu")
+    if device == "cuda":
+        workers, _, note = fit_workers(workers, model_mb, gpu_free_memory_mb())
+        available = available_memory_mb()
+        audio_budget = None if available is None else available * HEADROOM
+    else:
+        workers, audio_budget, note = fit_workers(workers, model_mb, available_memory_mb(), typical)
+    if note:
+        print(f"⚠️ {note}")
+    longest = max(known, default=0)
+    if audio_budget is not None and not chunk_sec and audio_memory_mb(longest) > audio_budget:
+        print(f"⚠️ 最長的檔案轉錄時約需 {gb(audio_memory_mb(longest))} 記憶體，超過可用量，建議加 --chunk-minutes 切段")
+    return workers, audio_budget
+
+def apply_thread_budget(args, device, workers=1):
+    # 單一行程載入模型時（服務、監看、單 worker 批次）依命令列設定分配執行緒，CPU 推論時印出分配結果
+    budget = plan_threads(workers, args.threads, args.interop_threads, args.decode_threads)
+    if device == "cpu":
+        print(f"🧮 {budget.describe()}")
+    apply_threads(budget.config())
+    return budget
+
+def cpu_opt_options(args):
+    # --compile 單獨指定時也啟用 --cpu-opt
+    if not (args.cpu_opt or args.compile):
+        return None
+    return {"precision": args.cpu_opt or "auto", "compile": args.compile}
+
+def engine_label(device, quantize=False, engine="torch"):
+    if engine == "onnx":
+        return "，ONNX Runtime"
+    return "，int8" if quantize and device == "cpu" else ""
+
+def load_model_logged(model_choice, device, quantize=False, engine="torch", cpu_opt=None, cache_dir=DEFAULT_CACHE_DIR):
+    device = engine_device(engine, device)
+    print(f"📥 載入模型：{model_choice}（{device.upper()}{engine_label(device, quantize, engine)}）")
+    return load_model(model_choice, device, quantize, engine, cpu_opt, cache_dir)
+
+def run_service_batch(url, input_paths, language, model_choice, vad=False, use_cache=True, ledger=None, durations=None):
+    failed = []
+    with AudioProgress(input_paths, durations, desc="批次處理中（服務）") as bar:
+        for p in input_paths:
+            job = {"input_path": str(Path(p).resolve()), "language": language, "model": model_choice, "vad": vad,
+                   "cache": use_cache, "zip_store": ZIP_OPTIONS["compression"] == zipfile.ZIP_STORED,
+                   "zip_level": ZIP_OPTIONS["compresslevel"], "stream": AUDIO_OPTIONS["stream"]}
+            try:
+                job_started(ledger, p)
+                with METRICS.current(p), METRICS.stage("service"):
+                    zip_path = submit_job(url, job)["zip"]
+                tqdm.write(f"✅ 完成：{zip_path}")
+                job_done(ledger, p, zip_path)
+            except Exception as e:
+                job_failed(failed, p, e, ledger)
+            bar.advance(p)
+    report_failures(failed)
+    return failed
+
+# 監看模式：模型只載入一次，資料夾出現新檔案且寫入完成後立即轉錄，已完成的檔案不再處理
+def run_watch(args):
+    if not args.input_folder or not Path(args.input_folder).is_dir():
+        print("請以 --input-folder 指定要監看的資料夾。")
+        exit()
+    folder = Path(args.input_folder)
+    language = "English" if args.language == "en" else "Chinese"
+    url = service_url(port=args.service_port)
+    use_service = not args.no_service and service_available(url)
+    model_choice = admit_model(args, get_model_choice(args.model), use_service)
+    ledger = JobLedger(folder / LEDGER_NAME, model_choice, language)
+    set_zip_options(args.zip_store, args.zip_level)
+    AUDIO_OPTIONS["stream"] = args.stream_audio
+    cache = None if args.no_cache else TranscriptCache(args.cache_dir, args.cache_size_mb)
+    enable_metrics(args, folder)
+
+    if use_service:
+        print(f"🔗 已連線轉錄服務 {url}，模型：{model_choice}，語言：{language}")
+    else:
+        device = resolve_device(args.device)
+        apply_thread_budget(args, device)
+        set_cache_options(engine_device(args.engine, device), args.quantize, args.engine, cpu_opt_options(args))
+        model = load_model_logged(model_choice, device, args.quantize, args.engine, cpu_opt_options(args), args.cache_dir)
+
+    watch_start = time.time()
+    with FolderWatcher(folder, MEDIA_EXTS, args.watch_settle) as watcher:
+        print(f"👀 監看中：{folder}（{watcher.backend}，檔案 {args.watch_settle:g} 秒未變動即開始轉錄，Ctrl+C 結束）")
+        try:
+            while True:
+                for p in watcher.poll():
+                    # 工作紀錄已完成或已有輸出 zip 的檔案直接略過，不再詢問
+                    if not ledger.remaining([p]) or (folder / output_zip_name(p, model_choice)).exists():
+                        continue
+                    ledger.register([p])
+                    if use_service:
+                        run_service_batch(url, [p], language, model_choice, args.vad, not args.no_cache, ledger)
+                    else:
+                        run_sequential_batch([p], language, model, model_choice, args.vad, cache, ledger)
+        except KeyboardInterrupt:
+            print("\n🔴 已停止監看")
+    report_metrics(args, watch_start)
+
+def resolve_device(device):
+    import torch
+    device = device.lower()
+    if device == "cpu":
+        return "cpu"
+    if device == "gpu" and torch.cuda.is_available():
+        return "cuda"
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+def get_model_choice(model_input):
+    model_map = {"1": "base", "2": "medium", "3": "large-v2",
+                 "base": "base", "medium": "medium", "large-v2": "large-v2"}
+    return model_map.get(model_input.lower(), "base")
+
+# 互動模式背景載入：選好模型／裝置就開始載入，後續提問與覆蓋檢查和載入同時進行
+class ModelPreloader:
+    def __init__(self):
+        self._jobs = {}
+        self._queue = queue.Queue()
+        self._auto_device = None
+        # daemon 執行緒：使用者取消或路徑錯誤時可直接結束，不必等模型載完
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            (model_choice, device), future = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                import whisper
+                resolved = resolve_device(device)
+                if device == "auto":
+                    self._auto_device = resolved
+                future.set_result((whisper.load_model(model_choice, device=resolved), resolved))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def _key(self, model_choice, device):
+        # gpu 與 auto 的判斷結果相同；沒有 GPU 時 cpu 也等同 auto，可沿用已在載入的模型
+        if device == "gpu" or (device == "cpu" and self._auto_device == "cpu"):
+            device = "auto"
+        return model_choice, device
+
+    def request(self, model_choice, device="auto"):
+        key = self._key(model_choice, device)
+        for other, future in self._jobs.items():
+            if other != key:
+                future.cancel()
+        self._jobs = {k: f for k, f in self._jobs.items() if k == key}
+        if key not in self._jobs:
+            self._jobs[key] = Future()
+            self._queue.put((key, self._jobs[key]))
+        return self._jobs[key]
+
+    def get(self, model_choice, device="auto"):
+        future = self.request(model_choice, device)
+        if not future.done():
+            print("⏳ 等待模型載入完成…")
+        model, resolved = future.result()
+        self._jobs = {}
+        return model, resolved
+
+def interactive_mode():
+    input_path = input("請輸入檔案或資料夾完整路徑：").strip('"').strip()
+    if not os.path.exists(input_path):
+        print("檔案或資料夾不存在。")
+        exit()
+
+    # 先以預設模型（base、自動裝置）預載，使用者選擇不同時再改載
+    preloader = ModelPreloader()
+    preloader.request("base")
+
+    print("請選擇語言：\n1. 中文\n2. 英文")
+    lang_choice = input("輸入數字 [1-2]，預設為 1：").strip()
+    language = "English" if lang_choice == "2" else "Chinese"
+
+    print("\n請選擇模型：\n1. base\n2. medium\n3. large-v2")
+    model_choice = get_model_choice(input("輸入數字 [1-3]，預設為 1：").strip())
+    preloader.request(model_choice)
+
+    print("\n選擇運算裝置：\n1. 自動\n2. 強制 CPU\n3. 強制 GPU")
+    device_choice = {"2": "cpu", "3": "gpu"}.get(input("輸入數字 [1-3]，預設為 1：").strip(), "auto")
+    preloader.request(model_choice, device_choice)
+
+    # CPU 最佳化在模型載入完成後套用（GPU 模式不適用）
+    cpu_opt = None
+    if device_choice != "gpu":
+        print("\n是否啟用 CPU 最佳化（inference mode、bf16、暖機）？\n1. 否（預設）\n2. 是")
+        if input("輸入數字 [1-2]，預設為 1：").strip() == "2":
+            cpu_opt = {"precision": "auto", "compile": False}
+
+    # 檔案搜尋與覆蓋提示和背景載入模型同時進行
+    input_path_obj = Path(input_path)
+    if input_path_obj.is_file():
+        files = [input_path_obj]
+    elif input_path_obj.is_dir():
+        discovery = MediaDiscovery(input_path_obj)
+        files = list(discovery)
+        existing_zips = find_existing_outputs(discovery, files, model_choice)
+        if existing_zips and not confirm_overwrite(existing_zips):
+            print("已取消。")
+            exit()
+    else:
+        print("不支援的路徑格式。")
+        return
+
+    model, device = preloader.get(model_choice, device_choice)
+    apply_threads(plan_threads().config())
+    if cpu_opt and device == "cpu":
+        model = apply_cpu_opt(model, cpu_opt)
+    print(f"\n使用裝置：{device.upper()}，模型：{model_choice}，語言：{language}")
+    set_cache_options(device, cpu_opt=cpu_opt)
+    cache = TranscriptCache()
+
+    if input_path_obj.is_file():
+        transcribe_file(str(input_path_obj), language, model, input_path_obj.parent, model_choice, cache=cache)
+        return
+    with AudioProgress(files, probe_durations(files)) as bar:
+        for media_file in files:
+            try:
+                transcribe_file(str(media_file), language, model, input_path_obj, model_choice, cache=cache)
+            except Exception as e:
+                print(f"❌ 轉換失敗：{media_file.name} ({e})")
+            bar.advance(media_file)
+
+def run_sequential_batch(input_paths, language, model, model_choice, vad=False, cache=None, ledger=None, durations=None):
+    failed = []
+    with AudioProgress(input_paths, durations) as bar:
+        for p in input_paths:
+            try:
+                job_started(ledger, p)
+                with METRICS.current(p):
+                    zip_path = transcribe_file(str(p), language, model, p.parent, model_choice, vad=vad, cache=cache)
+                job_done(ledger, p, zip_path)
+            except Exception as e:
+                job_failed(failed, p, e, ledger)
+            bar.advance(p)
+    report_failures(failed)
+    return failed
+
+# 效能紀錄：--metrics 啟用，寫入 JSON Lines，批次結束印出摘要，可另輸出 Prometheus textfile
+def enable_metrics(args, output_folder):
+    if args.metrics or args.metrics_log or args.metrics_prom:
+        METRICS.enable(args.metrics_log or Path(output_folder) / METRICS_LOG_NAME)
+
+def report_metrics(args, batch_start=None):
+    if not METRICS.enabled:
+        return
+    try:
+        summary = summarize(load_run(METRICS.log_path, METRICS.run_id))
+    except OSError:
+        return
+    print_summary(summary, None if batch_start is None else time.time() - batch_start)
+    print(f"   紀錄檔：{METRICS.log_path}")
+    if args.metrics_prom:
+        write_prometheus(summary, args.metrics_prom)
+
+def confirm_overwrite(names, more=False):
+    print("⚠️ 以下 zip 檔案已存在：")
+    for name in names:
+        print("   -", name)
+    if more:
+        print("   （仍在搜尋，後續找到的檔案不再逐一詢問）")
+    print("是否繼續？\n1. 是（預設）\n2. 否")
+    return input("輸入選項 [1-2]：").strip() != "2"
+
+# 邊搜尋邊轉錄（--recursive）：--resume / --retry-failed 時略過工作紀錄已完成的檔案，
+# 其餘登記到工作紀錄後立即交給批次，不必等整棵目錄掃完
+def stream_inputs(discovery, ledger, model_choice, resume=False, only_failed=False, confirm=None, stats=None):
+    # confirm：第一次遇到已有輸出 zip 時呼叫一次，回傳 False 即停止送出後續檔案；None 表示不詢問
+    stats = {} if stats is None else stats
+    stats.update(found=0, queued=0)
+
+    def found():
+        for p in discovery:
+            stats["found"] += 1
+            yield p
+
+    paths = ledger.iter_remaining(found(), only_failed) if resume else found()
+    for p in paths:
+        if confirm and discovery.has_output(p, output_zip_name(p, model_choice)):
+            if not confirm([output_zip_name(p, model_choice)]):
+                print("已取消，不再送出新的檔案。")
+                return
+            confirm = None
+        ledger.register([p])
+        stats["queued"] += 1
+        yield p
+
+ORDER_NAMES = {"longest": "長檔優先", "shortest": "短檔優先", "name": "依檔名"}
+
+def arg_mode(args):
+    # 參數檢查、檔案搜尋、覆蓋提示都不需要 torch，等真正開始推論才載入
+    if args.input_file:
+        if not Path(args.input_file).is_file():
+            print("檔案或資料夾不存在。")
+            exit()
+        input_paths = [Path(args.input_file)]
+        streaming = False
+    elif args.input_folder:
+        if not Path(args.input_folder).is_dir():
+            print("檔案或資料夾不存在。")
+            exit()
+        discovery = MediaDiscovery(args.input_folder, recursive=args.recursive, include=args.include, exclude=args.exclude)
+        # 遞迴搜尋時邊找邊轉錄；指定 --order 時需先掃完才能依長度排序
+        streaming = args.recursive and args.order == "auto"
+        input_paths = None if streaming else list(discovery)
+    else:
+        print("請提供 --input-file 或 --input-folder")
+        exit()
+
+    language = "English" if args.language == "en" else "Chinese"
+    url = service_url(port=args.service_port)
+    use_service = not args.no_service and service_available(url)
+    model_choice = admit_model(args, get_model_choice(args.model), use_service)
+
+    # 工作紀錄：放在輸出資料夾，--resume 跳過已完成、--retry-failed 只重跑失敗的檔案
+    output_folder = Path(args.input_folder) if args.input_folder else Path(args.input_file).parent
+    ledger = JobLedger(output_folder / LEDGER_NAME, model_choice, language)
+    if (args.resume or args.retry_failed) and not streaming:
+        before = len(input_paths)
+        input_paths = ledger.remaining(input_paths, only_failed=args.retry_failed)
+        print(f"⏩ 續跑：{before} 個檔案中剩 {len(input_paths)} 個待處理")
+        if not input_paths:
+            return
+
+    # 覆蓋提示
+    if args.input_folder and not streaming:
+        existing_zips = find_existing_outputs(discovery, input_paths, model_choice)
+        if existing_zips and not args.no_prompt and not confirm_overwrite(existing_zips):
+            print("已取消。")
+            exit()
+    if streaming:
+        # 與一次列出時相同：只有 --resume / --retry-failed 才依工作紀錄略過，已有 zip 時詢問一次（--no-prompt 不詢問）
+        stats = {}
+        resume = args.resume or args.retry_failed
+        confirm = None if args.no_prompt else lambda names: confirm_overwrite(names, more=True)
+        input_paths = stream_inputs(discovery, ledger, model_choice, resume, args.retry_failed, confirm, stats)
+        print("🔎 遞迴搜尋中，找到的檔案立即開始轉錄" + ("（工作紀錄已完成的檔案自動略過）" if resume else ""))
+    else:
+        ledger.register(input_paths)
+    enable_metrics(args, output_folder)
+    batch_start = time.time()
+    many = streaming or len(input_paths) > 1
+
+    # 推論前先平行讀取所有檔案的長度（只讀檔頭），進度條改以音訊秒數估算剩餘時間
+    durations = None if streaming else probe_durations(input_paths, cache_dir=None if args.no_cache else args.cache_dir)
+    if many and not streaming:
+        unknown = sum(d is None for d in durations.values())
+        note = f"（{unknown} 個無法判斷長度）" if unknown else ""
+        print(f"🔎 共 {len(input_paths)} 個檔案，音訊總長 {sum(d or 0 for d in durations.values()) / 60:.1f} 分鐘{note}")
+
+    set_zip_options(args.zip_store, args.zip_level)
+    AUDIO_OPTIONS["stream"] = args.stream_audio
+    chunk_sec = args.chunk_minutes * 60
+    if args.stream_audio and (args.vad or chunk_sec):
+        print("⚠️ --vad 與 --chunk-minutes 需要整段音訊，這些檔案仍先完整解碼。")
+    cache = None if args.no_cache else TranscriptCache(args.cache_dir, args.cache_size_mb)
+    requested = auto_workers(threads=args.threads) if args.workers == "auto" else args.workers
+    workers = max(1, requested if chunk_sec or streaming else min(requested, len(input_paths)))
+
+    if use_service:
+        print(f"\n🔗 已連線轉錄服務 {url}，模型：{model_choice}，語言：{language}")
+    else:
+        device = resolve_device(args.device)
+        if args.engine == "onnx" and device != "cpu":
+            print("⚠️ ONNX 引擎目前只支援 CPU，改用 CPU 推論。")
+        if args.engine == "onnx" and args.quantize:
+            print("⚠️ ONNX 引擎不支援 --quantize，維持原精度。")
+        device = engine_device(args.engine, device)
+        if args.workers == "auto" and device == "cuda":
+            workers = 1  # GPU 上每個 worker 都要一份顯示記憶體
+        workers, audio_budget = admit_workers(args, model_choice, device, workers, durations, chunk_sec)
+        if workers > 1 and device == "cuda":
+            print("⚠️ GPU 模式下每個 worker 都會載入一份模型，請確認顯示記憶體足夠。")
+        if args.quantize and device != "cpu":
+            print("⚠️ int8 量化只支援 CPU，GPU 模式維持原精度。")
+        cpu_opt = cpu_opt_options(args)
+        if cpu_opt and (device != "cpu" or args.engine != "torch"):
+            print("⚠️ --cpu-opt 只適用於 CPU 的 torch 引擎，已略過。")
+        label = engine_label(device, args.quantize, args.engine).lstrip("，")
+        label = f"（{label}）" if label else ""
+        print(f"\n使用裝置：{device.upper()}，模型：{model_choice}{label}，語言：{language}")
+        budget = apply_thread_budget(args, device, workers)
+        set_cache_options(device, args.quantize, args.engine, cpu_opt)
+        if workers == 1:
+            model = load_model(model_choice, device, args.quantize, args.engine, cpu_opt, args.cache_dir)
+
+    # 排程：多 worker 時預設最長的先送，最後才不會只剩一個長檔案在跑
+    order = args.order if args.order != "auto" else ("longest" if workers > 1 and not use_service else None)
+    if order and many and not streaming:
+        input_paths = order_paths(input_paths, durations, order)
+        if workers > 1 and not use_service and not chunk_sec:
+            ratio = simulate_makespan(input_paths, durations, workers) / makespan_lower_bound(input_paths, durations, workers)
+            print(f"📋 排程：{ORDER_NAMES[order]}，預估總耗時為理想值的 {ratio:.2f} 倍")
+
+    # 切段只在多 worker 平行批次中進行（GPU 自動 worker、記憶體限制或轉錄服務都會只剩一個）
+    if chunk_sec and (use_service or workers == 1):
+        print("⚠️ --chunk-minutes 需要多個 worker，已略過。")
+
+    if use_service:
+        run_service_batch(url, input_paths, language, model_choice, args.vad, not args.no_cache, ledger, durations)
+    elif workers > 1:
+        run_parallel_batch(input_paths, language, model_choice, device, workers, args.vad, chunk_sec, cache, ledger, durations, args.quantize, args.engine, cpu_opt, budget, audio_budget, args.cache_dir)
+    elif args.pack_short > 1 and many and not args.stream_audio:
+        run_packed_batch(input_paths, language, model, model_choice, args.pack_short, args.vad, cache, ledger, durations)
+    elif args.prefetch > 0 and many and not args.stream_audio:
+        run_pipelined_batch(input_paths, language, model, model_choice, args.prefetch, args.vad, cache, ledger, durations)
+    else:
+        run_sequential_batch(input_paths, language, model, model_choice, args.vad, cache, ledger, durations)
+    if streaming:
+        print(f"🔎 共找到 {stats['found']} 個檔案，轉錄 {stats['queued']} 個")
+    report_metrics(args, batch_start)
+
+def workers_arg(value):
+    return value if value == "auto" else int(value)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Whisper 語音轉檔/批次處理工具 (繁體強制轉換)")
+    parser.add_argument('--input-file', help='單一檔案路徑')
+    parser.add_argument('--input-folder', help='資料夾路徑（批次）')
+    parser.add_argument('--language', choices=['zh', 'en'], help='語言 zh=中文(預設), en=英文', default='zh')
+    parser.add_argument('--model', choices=['base', 'medium', 'large-v2'], default='base', help='Whisper模型')
+    parser.add_argument('--device', choices=['auto', 'cpu', 'gpu'], default='auto', help='運算裝置')
+    parser.add_argument('--no-prompt', action='store_true', help='跳過覆蓋確認')
+    parser.add_argument('--workers', type=workers_arg, default=1, help='平行 worker 數（多核心 CPU 批次用，預設 1）；auto=依核心數自動決定')
+    parser.add_argument('--prefetch', type=int, default=2, help='管線批次預先解碼的檔案數，0=關閉（預設 2）')
+    parser.add_argument('--pack-short', type=int, default=0, help='將 ≤30 秒短音檔每 N 個打包成一批一起推論，0=關閉')
+    parser.add_argument('--vad', action='store_true', help='推論前先偵測語音區段，跳過靜音（長錄音可大幅縮短時間）')
+    parser.add_argument('--chunk-minutes', type=float, default=0, help='搭配 --workers：超長音檔在靜音處切成約 N 分鐘的段落平行轉錄，0=關閉')
+    parser.add_argument('--no-cache', action='store_true', help='不使用轉錄快取，強制重新推論')
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR), help='快取資料夾（轉錄結果、int8 量化模型、ONNX 匯出檔）')
+    parser.add_argument('--cache-size-mb', type=float, default=1024, help='快取容量上限（MB），超過時淘汰最久未使用者')
+    parser.add_argument('--resume', action='store_true', help='依輸出資料夾的工作紀錄續跑，跳過已完成的檔案')
+    parser.add_argument('--retry-failed', action='store_true', help='只重跑工作紀錄中失敗的檔案')
+    parser.add_argument('--zip-level', type=int, choices=range(10), metavar='0-9', help='zip deflate 壓縮等級（預設 6）')
+    parser.add_argument('--zip-store', action='store_true', help='zip 不壓縮（ZIP_STORED），打包最快')
+    parser.add_argument('--serve', action='store_true', help='啟動常駐轉錄服務（模型常駐記憶體，供命令列送出工作）')
+    parser.add_argument('--service-port', type=int, default=DEFAULT_PORT, help=f'轉錄服務的本機埠號（預設 {DEFAULT_PORT}）')
+    parser.add_argument('--max-models', type=int, default=2, help='轉錄服務最多同時保留的模型數，超過時釋放最久未使用者（預設 2）')
+    parser.add_argument('--no-service', action='store_true', help='即使轉錄服務正在執行，也在本行程直接載入模型轉錄')
+    parser.add_argument('--metrics', action='store_true', help=f'記錄每個檔案各階段耗時、RTF、峰值記憶體等，寫入輸出資料夾的 {METRICS_LOG_NAME} 並於結束時印出摘要')
+    parser.add_argument('--metrics-log', help='效能紀錄（JSON Lines）路徑，指定時自動啟用 --metrics')
+    parser.add_argument('--metrics-prom', help='另外輸出 Prometheus textfile（node_exporter textfile collector 用），指定時自動啟用 --metrics')
+    parser.add_argument('--order', choices=ORDERS, default='auto', help='批次處理順序：longest=長檔優先、shortest=短檔優先（較早看到結果）、name=依檔名；auto=多 worker 時長檔優先，否則維持原順序')
+    parser.add_argument('--watch', action='store_true', help='監看 --input-folder：新檔案寫入完成後立即以已載入的模型轉錄，已完成的檔案不再處理（Ctrl+C 結束）')
+    parser.add_argument('--watch-settle', type=float, default=2.0, help='監看模式：檔案大小持續 N 秒不變才視為寫入完成（預設 2）')
+    parser.add_argument('--recursive', action='store_true', help='遞迴搜尋 --input-folder 的子資料夾，邊搜尋邊轉錄；搭配 --resume 略過已完成的檔案，已有輸出 zip 時詢問一次（--no-prompt 不詢問）')
+    parser.add_argument('--include', nargs='+', default=[], help='只處理符合的檔案，樣式比對檔名或相對路徑，如 "*.mp3" "2024-*/*"（請加引號）')
+    parser.add_argument('--exclude', nargs='+', default=[], help='略過符合的檔案或子資料夾，如 "archive" "*_draft.*"（請加引號）')
+    parser.add_argument('--quantize', action='store_true', help='CPU 推論使用動態 int8 量化（較快、較省記憶體，準確度略降）；量化結果快取，之後直接載入')
+    parser.add_argument('--engine', choices=ENGINES, default='torch', help=f'推論引擎：torch=PyTorch（預設）、onnx=ONNX Runtime（僅 CPU，第一次使用時匯出並快取模型，需先 {ONNX_REQUIREMENT}）')
+    parser.add_argument('--cpu-opt', nargs='?', const='auto', choices=PRECISIONS, help='CPU 推論最佳化：inference mode、encoder bf16（auto=CPU 支援 AVX512-BF16/AMX 時使用，fp32=維持原精度）並於載入後暖機')
+    parser.add_argument('--compile', action='store_true', help='搭配 --cpu-opt：以 torch.compile 編譯 encoder（需 C++ 編譯器，暖機多花數十秒，適合大量檔案）')
+    parser.add_argument('--threads', type=int, help='每個 worker 的 torch 運算執行緒數（預設依核心數與 worker 數自動分配）')
+    parser.add_argument('--interop-threads', type=int, help='torch inter-op 執行緒數（預設 1）')
+    parser.add_argument('--decode-threads', type=int, help='ffmpeg 解碼執行緒數（預設：8 核以下 1，以上 2）')
+    parser.add_argument('--no-memory-check', action='store_true', help='不檢查可用記憶體（預設會在記憶體不足時改用較小模型、減少 worker 或讓長檔案排隊）')
+    parser.add_argument('--stream-audio', action='store_true', help='串流解碼：分段讀取 ffmpeg 輸出並逐段計算 log-mel，數小時的長音檔記憶體用量也固定，輸出與一般模式相同（不預先解碼下一個檔案；--vad、--chunk-minutes 仍整段解碼）')
+    args, unknown = parser.parse_known_args()
+
+    engine_error = check_engine(args.engine)
+    if engine_error:
+        print(f"❌ {engine_error}")
+        exit()
+
+    if args.serve:
+        run_service(args)
+    elif args.watch:
+        run_watch(args)
+    # 沒有參數時啟動互動式
+    elif not any([args.input_file, args.input_folder]):
+        interactive_mode()
+    else:
+        arg_mode(args)
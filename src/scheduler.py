@@ -0,0 +1,32 @@
+# 批次排程：依音訊長度決定送出順序。多 worker 共用佇列時最長的先送（LPT），
+# 避免最後只剩一個超長檔案在跑、其他核心閒置；也可短檔優先，較早看到結果
+import heapq
+
+ORDERS = ("auto", "longest", "shortest", "name")
+
+def estimate_durations(paths, durations=None):
+    # 無法判斷長度的檔案以已知檔案的平均長度估計
+    durations = durations or {}
+    known = [durations[p] for p in paths if durations.get(p)]
+    fallback = sum(known) / len(known) if known else 1.0
+    return {p: durations.get(p) or fallback for p in paths}
+
+def order_paths(paths, durations=None, order="longest"):
+    if order == "name":
+        return sorted(paths, key=lambda p: str(p).lower())
+    est = estimate_durations(paths, durations)
+    # sorted 為穩定排序，長度相同時維持原順序
+    return sorted(paths, key=lambda p: est[p], reverse=order == "longest")
+
+def simulate_makespan(paths, durations, workers):
+    # 模擬共用佇列：依序把檔案交給最早空出來的 worker，回傳全部完成的時間（音訊秒）
+    est = estimate_durations(paths, durations)
+    finish = [0.0] * max(1, workers)
+    for p in paths:
+        heapq.heapreplace(finish, finish[0] + est[p])
+    return max(finish)
+
+def makespan_lower_bound(paths, durations, workers):
+    # 理想值：總工作量平均分給所有 worker，但不會短於最長的單一檔案
+    est = estimate_durations(paths, durations)
+    return max(sum(est.values()) / max(1, workers), max(est.values(), default=0.0))
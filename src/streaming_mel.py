@@ -0,0 +1,151 @@
+# 串流 log-mel：分段讀取 ffmpeg 輸出、逐段計算 log-mel，交給 whisper 原本的 30 秒滑動解碼迴圈。
+# model.transcribe 會先把整段音訊解碼成 float32、再算整段 log-mel，數小時的錄音每個 worker 就要數 GB；
+# 串流時記憶體只與區段長度有關，輸出與一次算完整段相同
+import importlib
+
+from audio_decode import SAMPLE_RATE, stream_pcm
+
+BLOCK_SEC = 30  # 每次從 ffmpeg 讀取的音訊長度
+STREAM_MEMORY_SEC = 3 * BLOCK_SEC  # 同時在記憶體中的音訊：讀取中的區段與解碼迴圈前後的 30 秒視窗
+# 讀取途中幀數太少時留到下一段一起算：只有 1 幀時 BLAS 改走矩陣-向量乘法，mel 與整段計算差在最後一位
+MIN_BATCH_FRAMES = 100
+
+def log_mel_blocks(pcm_blocks, n_mels=80):
+    # 逐段產生與 whisper.log_mel_spectrogram(audio, padding=N_SAMPLES) 相同、尚未正規化的 log10 mel。
+    # 每一幀的 STFT 只用到前後 N_FFT/2 個樣本：開頭以反射填補、結尾補 N_SAMPLES 個 0，與 torch.stft(center=True) 一致
+    import numpy as np
+    import torch
+    from whisper.audio import HOP_LENGTH, N_FFT, N_SAMPLES, mel_filters
+    device = torch.device("cpu")
+    window = torch.hann_window(N_FFT).to(device)
+    filters = mel_filters(device, n_mels)
+    half = N_FFT // 2
+    state = {"buf": np.zeros(0, np.float32), "padded": False, "emitted": 0}
+
+    def take(limit=None):
+        # 計算緩衝內所有完整的幀；buf 從下一幀的起點開始
+        buf = state["buf"]
+        if not state["padded"]:
+            if len(buf) <= half:
+                return None
+            buf = np.concatenate([buf[half:0:-1], buf])
+            state["padded"] = True
+        state["buf"] = buf
+        if len(buf) < N_FFT:
+            return None
+        count = 1 + (len(buf) - N_FFT) // HOP_LENGTH
+        if limit is None and count < MIN_BATCH_FRAMES:
+            return None
+        if limit is not None:
+            count = min(count, limit - state["emitted"])
+        if count <= 0:
+            return None
+        chunk = torch.from_numpy(buf[:(count - 1) * HOP_LENGTH + N_FFT])
+        stft = torch.stft(chunk, N_FFT, HOP_LENGTH, window=window, center=False, return_complex=True)
+        state["buf"] = buf[count * HOP_LENGTH:]
+        state["emitted"] += count
+        return torch.clamp(filters @ stft.abs() ** 2, min=1e-10).log10()
+
+    samples = 0
+    for block in pcm_blocks:
+        samples += len(block)
+        state["buf"] = np.concatenate([state["buf"], block])
+        mel = take()
+        if mel is not None:
+            yield mel
+    # 結尾補 N_SAMPLES 個 0；STFT 結尾的反射填補落在這些 0 之內，同樣是 0
+    state["buf"] = np.concatenate([state["buf"], np.zeros(N_SAMPLES + half, np.float32)])
+    mel = take((samples + N_SAMPLES) // HOP_LENGTH)
+    if mel is not None:
+        yield mel
+
+class StreamingMel:
+    # 代替整段 log-mel 傳給 model.transcribe：whisper 只用到 shape 與 mel[:, a:b] 切片，
+    # 切片時才從 ffmpeg 讀取、計算需要的幀，並丟掉目前位置之前的幀（解碼迴圈只會往後移動）
+    def __init__(self, file, n_mels=80, threads=None, block_sec=BLOCK_SEC):
+        import torch
+        _install_hook()
+        self.file = str(file)
+        self.n_mels = n_mels
+        self.threads = threads
+        self.block_samples = int(block_sec * SAMPLE_RATE)
+        # 第一遍：whisper 以整段的最大值 - 8 為下限正規化，需先讀完一次才知道最大值與總幀數
+        peak = None
+        frames = 0
+        for block in self._raw_blocks():
+            frames += block.shape[-1]
+            peak = block.max() if peak is None else torch.maximum(peak, block.max())
+        self.floor = peak - 8.0
+        self.n_frames = frames
+        self._blocks = None
+        self._cache = torch.zeros(n_mels, 0)
+        self._start = 0  # _cache 第一幀的位置
+
+    def _raw_blocks(self):
+        return log_mel_blocks(stream_pcm(self.file, self.block_samples, threads=self.threads), self.n_mels)
+
+    @property
+    def shape(self):
+        return (self.n_mels, self.n_frames)
+
+    @property
+    def duration(self):
+        from whisper.audio import HOP_LENGTH, N_FRAMES
+        return (self.n_frames - N_FRAMES) * HOP_LENGTH / SAMPLE_RATE
+
+    def __getitem__(self, key):
+        import torch
+        rows, cols = key
+        start, stop, _ = cols.indices(self.n_frames)
+        if self._blocks is None or start < self._start:
+            self.close()  # 往回讀（不常見）時重新從頭解碼
+            self._blocks = self._raw_blocks()
+            self._cache = self._cache[:, :0]
+            self._start = 0
+        while True:
+            # 丟掉 start 之前的幀（包括 clip_timestamps 跳過的區段）
+            drop = min(start - self._start, self._cache.shape[-1])
+            if drop > 0:
+                self._cache = self._cache[:, drop:]
+                self._start += drop
+            if self._start + self._cache.shape[-1] >= stop:
+                break
+            block = next(self._blocks, None)
+            if block is None:
+                break
+            block = (torch.maximum(block, self.floor) + 4.0) / 4.0
+            self._cache = torch.cat([self._cache, block], dim=-1)
+        return self._cache[rows, :max(0, stop - start)]
+
+    def take(self, indices, axis=-1):
+        # 自動偵測語言時 whisper 以 pad_or_trim(mel, N_FRAMES) 取前 30 秒，非 tensor 輸入會呼叫 take
+        return self[:, indices.start:indices.stop]
+
+    def close(self):
+        if self._blocks is not None:
+            self._blocks.close()
+            self._blocks = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+_hook_installed = False
+
+def _install_hook():
+    # whisper.transcribe 以模組內的 log_mel_spectrogram 計算整段 log-mel；收到 StreamingMel 時直接沿用，其他輸入照舊
+    global _hook_installed
+    if _hook_installed:
+        return
+    transcribe_module = importlib.import_module("whisper.transcribe")
+    log_mel = transcribe_module.log_mel_spectrogram
+
+    def streaming_log_mel(audio, *args, **kwargs):
+        if isinstance(audio, StreamingMel):
+            return audio
+        return log_mel(audio, *args, **kwargs)
+
+    transcribe_module.log_mel_spectrogram = streaming_log_mel
+    _hook_installed = True
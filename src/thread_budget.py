@@ -0,0 +1,72 @@
+# 執行緒分配：依可用核心數決定 worker 數、每個 worker 的 torch intra-op / inter-op 執行緒與 ffmpeg 解碼執行緒。
+# ffmpeg、torch 與多個 worker 各自預設都會用滿所有核心，同時執行時超額訂閱，執行緒互相等待反而變慢
+import os
+
+from audio_decode import set_decode_threads
+
+MAX_INTRA_THREADS = 16  # whisper 的矩陣在 CPU 上超過約 16 執行緒後幾乎不再加速
+THREADS_PER_WORKER = 8  # --workers auto：每個 worker 約分到的核心數
+
+def available_cores():
+    # Linux 上會反映 taskset / cgroup cpuset 的限制
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def decode_reserve(cores):
+    # 與推論同時進行的解碼（管線批次預先解碼、切段時主行程解碼）保留的核心：小機器 1 核，大機器每 16 核 1 核
+    return 0 if cores <= 2 else max(1, cores // 16)
+
+def auto_workers(cores=None, threads=None):
+    cores = cores or available_cores()
+    compute = max(1, cores - decode_reserve(cores))
+    return max(1, compute // (threads or THREADS_PER_WORKER))
+
+class ThreadBudget:
+    def __init__(self, cores, workers, intra_op, inter_op, decode_threads, decode_cores):
+        self.cores = cores
+        self.workers = workers
+        self.intra_op = intra_op
+        self.inter_op = inter_op
+        self.decode_threads = decode_threads
+        self.decode_cores = decode_cores
+
+    def config(self):
+        # 傳給 spawn 的 worker 行程
+        return (self.intra_op, self.inter_op, self.decode_threads)
+
+    @property
+    def used(self):
+        return self.workers * self.intra_op + self.decode_cores
+
+    def describe(self):
+        text = (f"執行緒分配：{self.cores} 核心 → {self.workers} 個 worker × {self.intra_op} 執行緒"
+                f"（inter-op {self.inter_op}），ffmpeg 解碼 {self.decode_threads} 執行緒")
+        if self.used > self.cores:
+            text += f"；⚠️ 共需 {self.used} 執行緒，超過核心數"
+        elif self.workers == 1 and self.cores - self.used >= THREADS_PER_WORKER:
+            text += f"；閒置 {self.cores - self.used} 核心，多檔批次可加 --workers auto"
+        return text
+
+def plan_threads(workers=1, threads=None, interop_threads=None, decode_threads=None, cores=None):
+    # threads / interop_threads / decode_threads 為命令列指定值，None 表示自動
+    cores = cores or available_cores()
+    reserve = decode_reserve(cores)
+    workers = max(1, workers)
+    intra = threads or max(1, min(MAX_INTRA_THREADS, (cores - reserve) // workers))
+    # whisper 的運算圖是逐層串接，inter-op 平行用不到，多開只是多一組閒置執行緒池
+    inter = interop_threads or 1
+    decode = decode_threads or (1 if cores <= 8 else 2)
+    return ThreadBudget(cores, workers, intra, inter, decode, reserve)
+
+def apply_threads(config):
+    # config 為 ThreadBudget.config()；在載入模型的行程內呼叫
+    import torch
+    intra, inter, decode = config
+    torch.set_num_threads(intra)
+    try:
+        torch.set_num_interop_threads(inter)
+    except RuntimeError:
+        pass  # 已執行過平行運算後不能再更改，沿用目前設定
+    set_decode_threads(decode)
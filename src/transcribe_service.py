@@ -0,0 +1,101 @@
+# 常駐轉錄服務：模型只載入一次並以 LRU 保留在記憶體，透過本機 HTTP 接收轉錄工作
+import json
+import threading
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+class ModelLRU:
+    def __init__(self, loader, max_models=2):
+        self.loader = loader
+        self.max_models = max(1, max_models)
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            if name in self._models:
+                self._models.move_to_end(name)
+                return self._models[name]
+            while len(self._models) >= self.max_models:
+                evicted, _ = self._models.popitem(last=False)
+                print(f"♻️ 釋放模型：{evicted}")
+            model = self.loader(name)
+            self._models[name] = model
+            return model
+
+    def names(self):
+        with self._lock:
+            return list(self._models)
+
+def make_handler(handle_job, models):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._reply(200, {"status": "ok", "models": models.names()})
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/jobs":
+                self._reply(404, {"error": "not found"})
+                return
+            try:
+                job = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            except ValueError as e:
+                self._reply(400, {"error": f"invalid job: {e}"})
+                return
+            try:
+                self._reply(200, handle_job(job))
+            except Exception as e:
+                self._reply(500, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def serve(handle_job, models, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    server = ThreadingHTTPServer((host, port), make_handler(handle_job, models))
+    print(f"🟢 轉錄服務已啟動：http://{host}:{port}（Ctrl+C 結束）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🔴 轉錄服務已停止")
+    finally:
+        server.server_close()
+
+def service_url(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    return f"http://{host}:{port}"
+
+def service_available(url, timeout=0.5):
+    try:
+        with urllib.request.urlopen(f"{url}/health", timeout=timeout) as resp:
+            return json.load(resp).get("status") == "ok"
+    except (OSError, ValueError):
+        return False
+
+def submit_job(url, job, timeout=None):
+    req = urllib.request.Request(f"{url}/jobs", data=json.dumps(job).encode("utf-8"),
+                                 headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.load(resp)
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.load(e).get("error", str(e))
+        except ValueError:
+            message = str(e)
+        raise RuntimeError(message) from None
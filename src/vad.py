@@ -0,0 +1,87 @@
+# 能量式語音活動偵測（VAD），純 numpy、CPU 即可執行
+import numpy as np
+
+SAMPLE_RATE = 16000
+SPEECH_DB = -40.0  # 高於此音量（dBFS）一律視為語音
+
+def frame_energy_db(audio, sr=SAMPLE_RATE, frame_ms=30):
+    frame_len = int(sr * frame_ms / 1000)
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32), frame_len
+    frames = np.asarray(audio[:n_frames * frame_len], dtype=np.float32).reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(frames * frames, axis=1) + 1e-12)
+    return 20 * np.log10(rms), frame_len
+
+def speech_threshold_db(db, margin_db=12.0, floor_db=-60.0, speech_db=SPEECH_DB):
+    # 以第 10 百分位當作底噪，高出 margin_db 視為語音；門檻最高為 speech_db，
+    # 沒有停頓的連續語音第 10 百分位就是語音本身，不設上限會整段被當成靜音
+    return max(min(float(np.percentile(db, 10)) + margin_db, speech_db), floor_db)
+
+def detect_speech(audio, sr=SAMPLE_RATE, frame_ms=30, margin_db=12.0,
+                  min_speech=0.25, min_silence=2.0, pad=0.3):
+    db, frame_len = frame_energy_db(audio, sr, frame_ms)
+    if len(db) == 0:
+        return []
+    is_speech = db > speech_threshold_db(db, margin_db)
+    frame_sec = frame_len / sr
+
+    # 連續語音 frame 轉為 (start, end) 秒數區間
+    edges = np.diff(np.concatenate(([0], is_speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1) * frame_sec
+    ends = np.flatnonzero(edges == -1) * frame_sec
+
+    regions = []
+    for start, end in zip(starts, ends):
+        if regions and start - regions[-1][1] < min_silence:
+            regions[-1][1] = end  # 短暫停頓併入前一段
+        else:
+            regions.append([start, end])
+
+    total = len(audio) / sr
+    speech = []
+    for start, end in regions:
+        if end - start < min_speech:
+            continue
+        start, end = max(0.0, start - pad), min(total, end + pad)
+        if speech and start <= speech[-1][1]:
+            speech[-1] = (speech[-1][0], end)
+        else:
+            speech.append((start, end))
+    return [(round(float(s), 3), round(float(e), 3)) for s, e in speech]
+
+def group_regions(regions, max_sec=30.0):
+    # 相鄰語音區段合併成不超過 max_sec 的組（中間的短停頓一併保留）：
+    # whisper 每個 clip 至少跑一次 30 秒的 encoder，每段各自成為 clip 時，停頓多的錄音反而比不用 VAD 更慢
+    groups = []
+    for start, end in regions:
+        if groups and end - groups[-1][0] <= max_sec:
+            groups[-1] = (groups[-1][0], end)
+        else:
+            groups.append((start, end))
+    return groups
+
+def speech_clip_timestamps(audio, sr=SAMPLE_RATE, group_sec=30.0, **kwargs):
+    # 轉為 whisper.transcribe 的 clip_timestamps 格式：[start, end, start, end, ...]
+    return [t for region in group_regions(detect_speech(audio, sr, **kwargs), group_sec) for t in region]
+
+def find_split_points(audio, chunk_sec, sr=SAMPLE_RATE, search_sec=15.0, smooth_sec=0.5, frame_ms=30):
+    # 長音檔切段：在每個目標切點前後 search_sec 內找最安靜的位置
+    db, frame_len = frame_energy_db(audio, sr, frame_ms)
+    frame_sec = frame_len / sr
+    width = max(1, int(smooth_sec / frame_sec))
+    smoothed = np.convolve(db, np.ones(width) / width, mode="same") if len(db) else db
+    total = len(audio) / sr
+    search_sec = min(search_sec, chunk_sec / 4)  # 切點一定往後推進
+
+    cuts = []
+    target = chunk_sec
+    while target < total - chunk_sec * 0.5:
+        lo = max(0, int((target - search_sec) / frame_sec))
+        hi = min(len(smoothed), int((target + search_sec) / frame_sec))
+        if hi <= lo:
+            break
+        cut = round(float((lo + int(np.argmin(smoothed[lo:hi])) + 0.5) * frame_sec), 3)
+        cuts.append(cut)
+        target = cut + chunk_sec
+    return cuts
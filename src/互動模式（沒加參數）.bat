@@ -1,4 +1,4 @@
 @echo off
 REM ʼҦG[ѼơAvBݵ
-python run_whisper_auto_1.7.py
+python run_whisper_auto_1.8.py
 pause
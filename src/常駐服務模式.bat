@@ -0,0 +1,7 @@
+@echo off
+REM 常駐服務模式：模型只載入一次，之後的批次 / 排程會自動把工作送到這裡
+REM 關閉此視窗或按 Ctrl+C 即停止服務
+
+python run_whisper_auto_1.8.py --serve --model large-v2 --device gpu
+
+pause
@@ -0,0 +1,7 @@
+@echo off
+REM 資料夾監看模式：模型只載入一次，錄音檔放進資料夾、寫入完成後幾秒內自動轉錄
+REM 已完成的檔案不會重複處理；關閉此視窗或按 Ctrl+C 即停止監看
+
+python run_whisper_auto_1.8.py --input-folder "D:\media" --watch --model large-v2 --language zh --device gpu
+
+pause
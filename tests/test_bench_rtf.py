@@ -0,0 +1,39 @@
+import csv
+import json
+
+import numpy as np
+
+from bench_rtf import FIELDS, SAMPLE_RATE, add_baseline_deltas, synth_audio, write_report
+
+def test_synth_audio_has_speech_and_silence():
+    audio = synth_audio(11)
+    assert audio.dtype == np.float32 and len(audio) == 11 * SAMPLE_RATE
+    frames = audio[: 10 * SAMPLE_RATE].reshape(-1, SAMPLE_RATE // 2)
+    rms = np.sqrt((frames ** 2).mean(axis=1))
+    assert rms.max() > 10 * rms.min()
+
+def test_write_report_csv_and_json(tmp_path):
+    records = [dict.fromkeys(FIELDS, 1) | {"model": "base", "vad": False}]
+    write_report(records, tmp_path / "r.csv")
+    with open(tmp_path / "r.csv", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]["model"] == "base" and list(rows[0]) == FIELDS
+    write_report(records, tmp_path / "r.json")
+    assert json.loads((tmp_path / "r.json").read_text(encoding="utf-8")) == records
+
+def test_quantize_deltas_compare_with_fp32():
+    base = dict.fromkeys(FIELDS) | {"model": "base", "weights": "tiny", "device": "cpu", "vad": False, "audio_sec": 10}
+    records = [base | {"quantized": False, "rtf": 0.6, "_text": "今天天氣很好"},
+               base | {"quantized": True, "rtf": 0.3, "_text": "今天天氣很糟"}]
+    fp32, int8 = add_baseline_deltas(records)
+    assert fp32["speedup_vs_fp32"] is None and "_text" not in fp32
+    assert int8["speedup_vs_fp32"] == 2.0
+    assert 0 < int8["text_diff_vs_fp32"] < 0.5
+
+def test_cpu_opt_deltas_use_plain_fp32_baseline():
+    base = dict.fromkeys(FIELDS) | {"model": "base", "weights": "tiny", "device": "cpu", "vad": False, "audio_sec": 10,
+                                    "quantized": False, "_text": "今天天氣很好"}
+    records = [base | {"cpu_opt": False, "rtf": 0.6}, base | {"cpu_opt": True, "rtf": 0.4}]
+    plain, opt = add_baseline_deltas(records)
+    assert plain["speedup_vs_fp32"] is None
+    assert opt["speedup_vs_fp32"] == 1.5 and opt["text_diff_vs_fp32"] == 0
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("whisper")
+
+from bench_rtf import load_app
+
+app = load_app()
+SR = 16000
+
+def seg(start, end, text, seek=0):
+    return {"id": 0, "seek": seek, "start": start, "end": end, "text": text}
+
+def test_split_long_audio_cuts_in_silence_with_overlap():
+    # 100 秒的聲音，58.5～59.5 秒靜音：切點落在靜音內，第二段往前多帶 2 秒
+    audio = 0.1 * np.random.default_rng(0).standard_normal(100 * SR).astype(np.float32)
+    audio[int(58.5 * SR):int(59.5 * SR)] = 0
+    chunks = app.split_long_audio(audio, 60)
+    assert len(chunks) == 2
+    (start0, cut0, audio0), (start1, cut1, audio1) = chunks
+    assert start0 == cut0 == 0.0
+    assert 58.5 <= cut1 <= 59.5
+    assert start1 == pytest.approx(cut1 - app.CHUNK_OVERLAP_SEC)
+    assert len(audio0) == int(cut1 * SR)
+    assert len(audio1) == len(audio) - int(start1 * SR)
+
+def test_stitch_chunks_offsets_and_drops_overlap():
+    first = {"language": "zh", "segments": [seg(0.0, 30.0, "一"), seg(30.0, 58.9, "二")]}
+    # 第二段從 57 秒開始、切點 59 秒：中點落在切點前的段落已由第一段輸出
+    second = {"language": "zh", "segments": [seg(0.0, 1.5, "重疊"), seg(1.5, 10.0, "三", seek=150), seg(10.0, 20.0, "四", seek=1000)]}
+    result = app.stitch_chunks([first, second], [0.0, 57.0], [0.0, 59.0])
+    assert [(s["id"], s["start"], s["end"], s["text"]) for s in result["segments"]] == [
+        (0, 0.0, 30.0, "一"), (1, 30.0, 58.9, "二"), (2, 58.5, 67.0, "三"), (3, 67.0, 77.0, "四")]
+    assert result["segments"][2]["seek"] == 150 + 57 * 100
+    assert result["text"] == "一二三四"
+    assert result["language"] == "zh"
+
+def test_stitch_chunks_dedups_repeated_text_at_the_cut():
+    first = {"language": "zh", "segments": [seg(0.0, 59.0, " 你好")]}
+    second = {"language": "zh", "segments": [seg(1.5, 3.0, "你好 "), seg(3.0, 5.0, " 再見"), seg(10.0, 12.0, " 再見")]}
+    result = app.stitch_chunks([first, second], [0.0, 57.0], [0.0, 59.0])
+    # 緊接在前一段之後的相同文字去掉；隔開超過 1 秒的重複保留
+    assert [s["text"] for s in result["segments"]] == [" 你好", " 再見", " 再見"]
+    assert [s["id"] for s in result["segments"]] == [0, 1, 2]
@@ -0,0 +1,43 @@
+import pytest
+
+from bench_rtf import load_app
+
+app = load_app()
+
+class CountingConverter:
+    def __init__(self, cc):
+        self.cc = cc
+        self.calls = []
+
+    def convert(self, text):
+        self.calls.append(text)
+        return self.cc.convert(text)
+
+@pytest.fixture
+def converter(monkeypatch):
+    opencc = pytest.importorskip("opencc")
+    cc = CountingConverter(opencc.OpenCC("s2t"))
+    monkeypatch.setattr(app, "get_converter", lambda: cc)
+    monkeypatch.setattr(app, "_convert_memo", {})
+    return cc
+
+def segments(*texts):
+    return [{"text": t} for t in texts]
+
+def test_batch_join_matches_per_segment_conversion(converter):
+    texts = [" 这是第一句", "没有变化的English", " 这是第一句", "后面还有一句 ", "123"]
+    assert app.convert_segments(segments(*texts)) == [converter.cc.convert(t.strip()) for t in texts]
+    # 重複與不含漢字的句子不送轉換，其餘合併成一次呼叫
+    assert converter.calls == ["这是第一句\n没有变化的English\n后面还有一句"]
+    app.convert_segments(segments("这是第一句", "后面还有一句"))
+    assert len(converter.calls) == 1
+
+def test_segments_with_newlines_are_converted_one_by_one(converter):
+    texts = ["第一行\n第二行", "这是一句"]
+    assert app.convert_segments(segments(*texts)) == [converter.cc.convert(t) for t in texts]
+    assert converter.calls == texts
+
+def test_english_skips_conversion(converter):
+    assert app.convert_segments(segments(" 这是一句 ", " hello"), language="English") == ["这是一句", "hello"]
+    assert app.convert_segments(segments("这是一句"), language="en") == ["这是一句"]
+    assert converter.calls == []
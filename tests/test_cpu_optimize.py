@@ -0,0 +1,50 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("whisper")
+
+import cpu_optimize
+from bench_rtf import load_model, synth_audio
+from cpu_optimize import describe, optimize_cpu_model, resolve_precision
+
+def tiny_model():
+    return load_model("base", "cpu", "tiny")
+
+def test_precision_falls_back_to_fp32_without_bf16(monkeypatch):
+    monkeypatch.setattr(cpu_optimize, "bf16_supported", lambda: False)
+    assert resolve_precision("auto") == "fp32" and resolve_precision("bf16") == "fp32"
+    monkeypatch.setattr(cpu_optimize, "bf16_supported", lambda: True)
+    assert resolve_precision("auto") == "bf16" and resolve_precision("fp32") == "fp32"
+
+def test_fp32_optimized_model_gives_identical_transcript():
+    audio = synth_audio(20)
+    options = dict(language="zh", fp16=False, verbose=None, temperature=0.0, beam_size=3)
+    expected = tiny_model().transcribe(audio, **options)
+    model, info = optimize_cpu_model(tiny_model(), "fp32")
+    assert info["precision"] == "fp32" and not info["compiled"] and info["warmup_sec"] > 0
+    result = model.transcribe(audio, **options)
+    assert [s["tokens"] for s in result["segments"]] == [s["tokens"] for s in expected["segments"]]
+    assert "暖機" in describe(info)
+
+@pytest.mark.skipif(not cpu_optimize.bf16_supported(), reason="CPU 不支援 bf16")
+def test_bf16_encoder_returns_fp32_features():
+    ref = tiny_model()
+    model, info = optimize_cpu_model(tiny_model(), "bf16", warmup_sec=0)
+    mel = torch.randn(1, 80, 3000)
+    with torch.inference_mode():
+        expected = ref.encoder(mel)
+    out = model.encoder(mel)
+    assert info["precision"] == "bf16" and out.dtype == torch.float32
+    assert ((out - expected).abs().mean() / expected.abs().mean()) < 0.05
+
+def test_failed_compile_falls_back_to_eager(monkeypatch):
+    def broken_compile(fn):
+        def run(*args, **kwargs):
+            raise RuntimeError("inductor unavailable")
+        return run
+
+    monkeypatch.setattr(cpu_optimize, "compile_supported", lambda: True)
+    monkeypatch.setattr(torch, "compile", broken_compile)
+    model, info = optimize_cpu_model(tiny_model(), "fp32", compile_encoder=True)
+    assert not info["compiled"] and info["warmup_sec"] is not None
+    assert model.encoder(torch.randn(1, 80, 3000)).dtype == torch.float32
@@ -0,0 +1,73 @@
+from discovery import MediaDiscovery
+from job_ledger import JobLedger
+
+def make_tree(root):
+    for rel in ["a.mp3", "b.WAV", "notes.txt", "a(base).zip",
+                "2024-01/c.m4a", "2024-01/c(base).zip", "2024-01/deep/d.mp4",
+                "2024-02/e_draft.wav", "archive/old.mp3"]:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+
+def rel_names(root, paths):
+    return [p.relative_to(root).as_posix() for p in paths]
+
+def test_top_level_only_by_default(tmp_path):
+    make_tree(tmp_path)
+    assert rel_names(tmp_path, MediaDiscovery(tmp_path)) == ["a.mp3", "b.WAV"]
+
+def test_recursive_with_include_and_exclude(tmp_path):
+    make_tree(tmp_path)
+    found = MediaDiscovery(tmp_path, recursive=True, exclude=["archive", "*_draft.*"])
+    assert rel_names(tmp_path, found) == ["a.mp3", "b.WAV", "2024-01/c.m4a", "2024-01/deep/d.mp4"]
+    only_2024 = MediaDiscovery(tmp_path, recursive=True, include=["2024-*/*"])
+    assert rel_names(tmp_path, only_2024) == ["2024-01/c.m4a", "2024-01/deep/d.mp4", "2024-02/e_draft.wav"]
+
+def test_streams_before_scan_finishes(tmp_path):
+    make_tree(tmp_path)
+    discovery = MediaDiscovery(tmp_path, recursive=True)
+    it = iter(discovery)
+    next(it)
+    assert discovery.scanned_dirs == 1  # 子資料夾尚未掃描就已交出第一個檔案
+
+def test_output_index(tmp_path):
+    make_tree(tmp_path)
+    discovery = MediaDiscovery(tmp_path, recursive=True)
+    found = {p.name: p for p in discovery}
+    assert discovery.has_output(found["a.mp3"], "a(base).zip")
+    assert discovery.has_output(found["c.m4a"], "c(base).zip")
+    assert not discovery.has_output(found["b.WAV"], "b(base).zip")
+    assert not discovery.has_output(found["d.mp4"], "d(base).zip")
+
+def test_ledger_filters_a_stream(tmp_path):
+    make_tree(tmp_path)
+    ledger = JobLedger(tmp_path / "jobs.sqlite", "base")
+    ledger.register([tmp_path / "a.mp3", tmp_path / "b.WAV"])
+    ledger.mark_done(tmp_path / "a.mp3", "a(base).zip")
+    remaining = ledger.iter_remaining(MediaDiscovery(tmp_path))
+    assert not isinstance(remaining, list)
+    assert rel_names(tmp_path, remaining) == ["b.WAV"]
+    ledger.close()
+
+def test_stream_inputs_follows_resume_and_prompt_rules(tmp_path):
+    from bench_rtf import load_app
+    app = load_app()
+    make_tree(tmp_path)
+    ledger = JobLedger(tmp_path / "jobs.sqlite", "base")
+    ledger.register([tmp_path / "b.WAV"])
+    ledger.mark_done(tmp_path / "b.WAV", "b(base).zip")
+
+    def stream(resume=False, confirm=None):
+        discovery = MediaDiscovery(tmp_path, recursive=True, exclude=["archive", "2024-02"])
+        return rel_names(tmp_path, app.stream_inputs(discovery, ledger, "base", resume, False, confirm))
+
+    everything = ["a.mp3", "b.WAV", "2024-01/c.m4a", "2024-01/deep/d.mp4"]
+    assert stream(resume=True) == ["a.mp3", "2024-01/c.m4a", "2024-01/deep/d.mp4"]
+    # 沒有 --resume：工作紀錄與既有 zip 都不略過
+    assert stream() == everything
+    # 已有 zip 時只詢問一次；回答否就停止送出
+    asked = []
+    assert stream(confirm=lambda names: asked.append(names) or True) == everything
+    assert asked == [["a(base).zip"]]
+    assert stream(confirm=lambda names: False) == []
+    ledger.close()
@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+from folder_watch import FolderWatcher
+
+EXTS = (".mp3", ".wav")
+
+def poll_until(watcher, seconds):
+    found = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        found += watcher.poll(0.05)
+    return found
+
+@pytest.mark.parametrize("use_inotify", [False, True])
+def test_emits_file_once_after_it_stops_growing(tmp_path, use_inotify):
+    with FolderWatcher(tmp_path, EXTS, settle_sec=0.3, use_inotify=use_inotify) as watcher:
+        target = tmp_path / "rec.wav"
+        with open(target, "wb") as f:
+            for _ in range(4):
+                f.write(b"\0" * 1000)
+                f.flush()
+                assert watcher.poll(0.1) == []  # 仍在寫入
+        (tmp_path / "rec(base).zip").write_bytes(b"zip")
+        (tmp_path / ".hidden.wav").write_bytes(b"x")
+        assert poll_until(watcher, 0.8) == [target]
+        # 內容未變：之後的掃描不再交出
+        assert poll_until(watcher, 0.5) == []
+
+def test_existing_files_are_picked_up(tmp_path):
+    (tmp_path / "a.mp3").write_bytes(b"a")
+    (tmp_path / "notes.txt").write_bytes(b"n")
+    with FolderWatcher(tmp_path, EXTS, settle_sec=0.1, use_inotify=False) as watcher:
+        assert watcher.backend == "polling"
+        assert poll_until(watcher, 0.4) == [tmp_path / "a.mp3"]
+
+def test_rewritten_file_is_emitted_again(tmp_path):
+    target = tmp_path / "a.wav"
+    target.write_bytes(b"a")
+    with FolderWatcher(tmp_path, EXTS, settle_sec=0.1, use_inotify=False) as watcher:
+        assert poll_until(watcher, 0.4) == [target]
+        target.write_bytes(b"longer content")
+        assert poll_until(watcher, 0.4) == [target]
@@ -0,0 +1,74 @@
+from job_ledger import DONE, FAILED, PENDING, RUNNING, JobLedger
+
+def interrupted_run(tmp_path):
+    # a 完成、b 失敗、c 轉錄到一半中斷、d 尚未開始
+    paths = [tmp_path / f"{name}.wav" for name in "abcd"]
+    ledger = JobLedger(tmp_path / "jobs.sqlite", "base", "Chinese")
+    ledger.register(paths)
+    for p in paths[:3]:
+        ledger.mark_running(p)
+    ledger.mark_done(paths[0], tmp_path / "a(base).zip")
+    ledger.mark_failed(paths[1], "RuntimeError: out of memory")
+    ledger.close()
+    return paths
+
+def test_resume_skips_only_finished_files(tmp_path):
+    paths = interrupted_run(tmp_path)
+    ledger = JobLedger(tmp_path / "jobs.sqlite", "base", "Chinese")
+    assert [ledger.states()[str(p.resolve())] for p in paths] == [DONE, FAILED, RUNNING, PENDING]
+    assert ledger.remaining(paths) == paths[1:]
+    # 其他模型的紀錄互不影響
+    other = JobLedger(tmp_path / "jobs.sqlite", "medium", "Chinese")
+    assert other.remaining(paths) == paths
+    other.close()
+    ledger.close()
+
+def test_retry_failed_picks_failed_files_only(tmp_path):
+    paths = interrupted_run(tmp_path)
+    ledger = JobLedger(tmp_path / "jobs.sqlite", "base", "Chinese")
+    assert ledger.remaining(paths, only_failed=True) == [paths[1]]
+    ledger.register([paths[1]])
+    ledger.mark_running(paths[1])
+    ledger.mark_done(paths[1], tmp_path / "b(base).zip")
+    assert ledger.remaining(paths, only_failed=True) == []
+    attempts, error = ledger._conn.execute("SELECT attempts, error FROM jobs WHERE path = ?", (str(paths[1].resolve()),)).fetchone()
+    assert (attempts, error) == (2, None)
+    ledger.close()
+
+def test_files_are_running_only_once_picked_up(tmp_path, monkeypatch):
+    from bench_rtf import load_app
+    app = load_app()
+    paths = [tmp_path / f"{name}.wav" for name in "abc"]
+    ledger = JobLedger(tmp_path / "jobs.sqlite", "base", "Chinese")
+    ledger.register(paths)
+    seen = []
+
+    def run_model(model, audio, *args):
+        seen.append([ledger.states()[str(p.resolve())] for p in paths])
+        return {"text": "", "segments": [], "language": "zh"}
+
+    monkeypatch.setattr(app, "load_audio", lambda path: path)
+    monkeypatch.setattr(app, "check_duration", lambda path, audio=None: None)
+    monkeypatch.setattr(app, "run_model", run_model)
+    monkeypatch.setattr(app, "save_outputs", lambda result, path, parent, model_choice: f"{path}.zip")
+    assert app.run_pipelined_batch(paths, "Chinese", None, "base", 2, ledger=ledger) == []
+    # 預先解碼、排隊中的檔案仍是待處理
+    assert seen[0] == [RUNNING, PENDING, PENDING]
+    assert seen[2][0] == DONE and seen[2][2] == RUNNING
+    ledger.close()
+
+def test_worker_marks_its_own_file_running(tmp_path, monkeypatch):
+    from bench_rtf import load_app
+    app = load_app()
+    path = tmp_path / "a.wav"
+    ledger = JobLedger(tmp_path / "jobs.sqlite", "base", "Chinese")
+    ledger.register([path])
+    monkeypatch.setattr(app, "apply_threads", lambda config: None)
+    monkeypatch.setattr(app, "load_model", lambda *args: None)
+    monkeypatch.setattr(app, "transcribe_file", lambda *args, **kwargs: ledger.states()[str(path.resolve())])
+    app._init_worker("base", "cpu", "Chinese", None, ledger_args=(str(ledger.db_path), "base", "Chinese"))
+    assert app._worker_transcribe(str(path)) == RUNNING
+    ledger.mark_done(path, "a(base).zip")
+    duration, = ledger._conn.execute("SELECT duration_sec FROM jobs").fetchone()
+    assert 0 <= duration < 60
+    ledger.close()
@@ -0,0 +1,47 @@
+from memory_budget import AudioAdmission, audio_memory_mb, fit_model, fit_workers, model_memory_mb
+
+def test_one_hour_of_audio_is_about_230_mb_of_pcm():
+    pcm_mb = audio_memory_mb(3600) / 4
+    assert 210 < pcm_mb < 235
+    assert audio_memory_mb(None) == 0
+
+def test_model_is_downgraded_only_when_it_does_not_fit():
+    assert fit_model("large-v2", 32 * 1024) == ("large-v2", None)
+    model, note = fit_model("large-v2", 8 * 1024)
+    assert model == "medium" and "改用 medium" in note
+    assert fit_model("large-v2", 4 * 1024)[0] == "base"
+    # int8 量化後 large-v2 放得下
+    assert fit_model("large-v2", 8 * 1024, quantize=True) == ("large-v2", None)
+    model, note = fit_model("base", 512)
+    assert model == "base" and "中止" in note
+    assert fit_model("large-v2", None) == ("large-v2", None)
+
+def test_workers_are_capped_by_memory():
+    model_mb = model_memory_mb("base")
+    workers, audio_budget, note = fit_workers(8, model_mb, 16 * 1024, audio_sec=600)
+    assert workers == 8 and note is None and audio_budget > 0
+    workers, audio_budget, note = fit_workers(8, model_mb, 6 * 1024, audio_sec=3600)
+    assert workers == 2 and "降為 2" in note
+    assert audio_budget == 6 * 1024 * 0.85 - 2 * model_mb
+    workers, _, note = fit_workers(2, model_memory_mb("large-v2"), 4 * 1024)
+    assert workers == 1 and "中止" in note
+    assert fit_workers(4, model_mb, None) == (4, None, None)
+
+def test_audio_admission_queues_until_memory_is_released():
+    admission = AudioAdmission(1000)
+    assert admission.fits(1500)  # 沒有進行中的檔案時一定放行
+    admission.acquire(800)
+    assert not admission.fits(300) and admission.fits(200)
+    admission.release(800)
+    assert admission.fits(300)
+    assert AudioAdmission(None).fits(10 ** 9)
+
+def test_service_jobs_skip_model_admission(monkeypatch):
+    from argparse import Namespace
+    from bench_rtf import load_app
+    app = load_app()
+    monkeypatch.setattr(app, "available_memory_mb", lambda: 4 * 1024)
+    args = Namespace(no_memory_check=False, quantize=False, engine="torch")
+    assert app.admit_model(args, "large-v2") == "base"
+    # 常駐服務佔用的記憶體不應讓命令列改用較小模型
+    assert app.admit_model(args, "large-v2", use_service=True) == "large-v2"
@@ -0,0 +1,73 @@
+import json
+import time
+
+import pytest
+
+from metrics import RSS_SAMPLE_SEC, Metrics, current_rss_mb, load_run, summarize, write_prometheus
+
+def test_disabled_metrics_are_noops(tmp_path):
+    m = Metrics()
+    with m.current("a.wav"), m.stage("infer"):
+        m.count("fallbacks")
+        m.note(audio_sec=3.0)
+    m.finish("a.wav", "done")
+    assert m._records == {}
+    assert m.config() is None
+
+def test_records_stages_and_summary(tmp_path):
+    log = tmp_path / "m.jsonl"
+    m = Metrics()
+    m.enable(log, run_id="r1")
+    with m.current("a.wav"):
+        m.note(audio_sec=10.0)
+        m.add("infer", 2.0)
+        m.add("infer.decode", 1.5)
+        m.add("infer.encoder", 0.5)
+        m.count("fallbacks")
+    with m.current(["a.wav", "b.wav"]):
+        m.add("zip", 1.0)
+    with m.current("b.wav"):
+        m.note(audio_sec=5.0)
+    m.finish("a.wav", "done")
+    m.finish("b.wav", "failed", error="boom")
+    m.finish("c.wav", "done")  # 其他行程處理的檔案不寫入
+
+    records = load_run(log, "r1")
+    assert [r["file"] for r in records] == ["a.wav", "b.wav"]
+    a = records[0]
+    assert a["stages"] == {"infer": 2.0, "infer.decoder": 1.0, "infer.encoder": 0.5, "zip": 0.5}
+    assert a["busy_sec"] == 2.5 and a["rtf"] == 0.25 and a["fallbacks"] == 1
+    assert records[1]["error"] == "boom"
+
+    summary = summarize(records)
+    assert (summary["files"], summary["done"], summary["failed"]) == (2, 1, 1)
+    assert summary["audio_sec"] == 15.0 and summary["busy_sec"] == 3.0
+
+    prom = tmp_path / "m.prom"
+    write_prometheus(summary, prom)
+    text = prom.read_text(encoding="utf-8")
+    assert 'whisper_batch_stage_seconds{stage="zip"} 1.0000' in text
+    assert 'whisper_batch_files{status="failed"} 1' in text
+
+def test_load_run_filters_other_runs(tmp_path):
+    log = tmp_path / "m.jsonl"
+    log.write_text(json.dumps({"run": "old"}) + "\nnot json\n", encoding="utf-8")
+    assert load_run(log, "new") == []
+
+def test_peak_rss_is_recorded_per_file(tmp_path):
+    np = pytest.importorskip("numpy")
+    if current_rss_mb() is None:
+        pytest.skip("無法讀取目前記憶體用量")
+    log = tmp_path / "m.jsonl"
+    m = Metrics()
+    m.enable(log, run_id="r1")
+    with m.current("big.wav"), m.stage("infer"):
+        buf = np.ones(64 * 1024 * 1024 // 8)  # 約 64 MB
+        time.sleep(4 * RSS_SAMPLE_SEC)
+        del buf
+    m.finish("big.wav", "done")
+    with m.current("small.wav"), m.stage("infer"):
+        time.sleep(2 * RSS_SAMPLE_SEC)
+    m.finish("small.wav", "done")
+    big, small = load_run(log, "r1")
+    assert big["peak_rss_mb"] - small["peak_rss_mb"] > 40
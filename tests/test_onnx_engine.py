@@ -0,0 +1,76 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("whisper")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnx")
+
+from bench_rtf import load_model, synth_audio
+from engines import check_engine, engine_device
+from onnx_engine import GRAPHS, load_onnx_model, onnx_dir
+
+def tiny_loader(model_choice, device):
+    torch.manual_seed(0)
+    return load_model(model_choice, device, "tiny")
+
+@pytest.fixture(scope="module")
+def models(tmp_path_factory):
+    cache_dir = tmp_path_factory.mktemp("onnx")
+    onnx_model, cached = load_onnx_model("base", cache_dir, tiny_loader, threads=1)
+    assert not cached
+    return tiny_loader("base", "cpu"), onnx_model, cache_dir
+
+def test_export_is_cached(models):
+    _, _, cache_dir = models
+    calls = []
+
+    def loader(model_choice, device):
+        calls.append(model_choice)
+        return tiny_loader(model_choice, device)
+
+    assert all((onnx_dir("base", cache_dir) / name).exists() for name in GRAPHS)
+    _, cached = load_onnx_model("base", cache_dir, loader, threads=1)
+    assert cached and calls == []
+
+def test_encoder_and_decoder_match_torch(models):
+    ref, model, _ = models
+    mel = torch.randn(2, 80, 3000)
+    tokens = torch.tensor([[50258, 50260, 50359, 50363]] * 2)
+    with torch.inference_mode():
+        audio_features = ref.encoder(mel)
+        assert torch.allclose(model.encoder(mel), audio_features, atol=1e-4)
+        assert torch.allclose(model.decoder(tokens, audio_features), ref.decoder(tokens, audio_features), atol=1e-3)
+
+def test_incremental_decoding_matches_full_sequence(models):
+    ref, model, _ = models
+    seq = torch.randint(0, 50000, (2, 12))
+    with torch.inference_mode():
+        audio_features = ref.encoder(torch.randn(2, 80, 3000))
+        full = ref.decoder(seq, audio_features)
+        cache = {}
+        steps = [model.decoder(seq[:, :4], audio_features, cache)]
+        steps += [model.decoder(seq[:, i:i + 1], audio_features, cache) for i in range(4, 12)]
+    assert torch.allclose(torch.cat(steps, 1), full, atol=1e-3)
+
+def test_transcribe_result_matches_torch(models):
+    ref, model, _ = models
+    audio = synth_audio(20)
+    options = dict(language="zh", fp16=False, verbose=None, temperature=0.0)
+    expected = ref.transcribe(audio, **options)
+    result = model.transcribe(audio, **options)
+    assert result.keys() == expected.keys()
+    assert [s["tokens"] for s in result["segments"]] == [s["tokens"] for s in expected["segments"]]
+    assert result["segments"][0].keys() == expected["segments"][0].keys()
+
+def test_engine_helpers():
+    assert check_engine("torch") is None and check_engine("onnx") is None
+    assert check_engine("tensorrt")
+    assert engine_device("onnx", "cuda") == "cpu" and engine_device("torch", "cuda") == "cuda"
+
+def test_export_goes_to_cache_dir(tmp_path, monkeypatch):
+    import whisper
+    from bench_rtf import load_app
+    app = load_app()
+    monkeypatch.setattr(whisper, "load_model", tiny_loader)
+    app.load_model("base", "cpu", engine="onnx", cache_dir=tmp_path)
+    assert all((onnx_dir("base", tmp_path) / name).exists() for name in GRAPHS)
@@ -0,0 +1,73 @@
+import pytest
+
+whisper = pytest.importorskip("whisper")
+
+from bench_rtf import decode_audio, load_app, write_fixture
+from transcript_cache import TranscriptCache
+
+app = load_app()
+
+def tokenizer():
+    return whisper.tokenizer.get_tokenizer(True, num_languages=99, language="en", task="transcribe")
+
+def decoded(*parts, avg_logprob=-0.3):
+    # parts：秒數（時間戳）或文字
+    tok = tokenizer()
+    tokens = []
+    for part in parts:
+        tokens += [tok.timestamp_begin + round(part / 0.02)] if isinstance(part, float) else tok.encode(part)
+    return whisper.DecodingResult(audio_features=None, language="en", tokens=tokens, avg_logprob=avg_logprob,
+                                  no_speech_prob=0.1, compression_ratio=1.0)
+
+def split(r, duration=5.0):
+    return [(seg["start"], seg["end"], seg["text"]) for seg in app._split_segments(r, tokenizer(), duration, 0.02)]
+
+def fake_result(text="hello"):
+    return {"text": text, "segments": [{"id": 0, "start": 0.0, "end": 1.0, "text": text}], "language": "en"}
+
+@pytest.fixture
+def short_files(tmp_path, monkeypatch):
+    # 沒有 ffmpeg 時直接讀取合成的 wav；推論以固定結果代替，只檢查分流與快取
+    monkeypatch.setattr(app, "load_audio", lambda path: decode_audio(path))
+    monkeypatch.setattr(app, "transcribe_short_batch", lambda model, audios, language: [fake_result("packed")] * len(audios))
+    monkeypatch.setattr(app, "run_model", lambda model, audio, language, verbose=True, vad=False: fake_result("full"))
+    return [write_fixture(tmp_path / f"a{i}.wav", 5 + i) for i in range(2)]
+
+def test_packed_results_use_their_own_cache_key(tmp_path, short_files):
+    cache = TranscriptCache(tmp_path / "cache")
+    assert app.run_packed_batch(short_files, "English", None, "base", 2, cache=cache) == []
+    for p in short_files:
+        assert cache.get(cache.key(p, "base", "English", vad=False)) is None
+        assert cache.get(cache.key(p, "base", "English", vad=False, packed=True))["text"] == "packed"
+
+def test_packed_run_reuses_full_transcripts(tmp_path, short_files):
+    cache = TranscriptCache(tmp_path / "cache")
+    cache.put(cache.key(short_files[0], "base", "English", vad=False), fake_result("cached"))
+    assert app.run_packed_batch(short_files, "English", None, "base", 2, cache=cache) == []
+    assert cache.get(cache.key(short_files[0], "base", "English", vad=False, packed=True)) is None
+
+def test_vad_bypasses_packing(tmp_path, short_files):
+    cache = TranscriptCache(tmp_path / "cache")
+    assert app.run_packed_batch(short_files, "English", None, "base", 2, vad=True, cache=cache) == []
+    for p in short_files:
+        assert cache.get(cache.key(p, "base", "English", vad=True))["text"] == "full"
+
+def test_split_segments_on_timestamp_pairs():
+    r = decoded(0.0, " hello", 2.0, 2.0, " world", 3.5)
+    assert split(r) == [(0.0, 2.0, " hello"), (2.0, 3.5, " world")]
+    assert not app._needs_fallback(r, tokenizer().timestamp_begin)
+    # 沒有成對時間戳：整段一個段落，結束於最後的時間戳；完全沒有時間戳時結束於音檔長度
+    assert split(decoded(0.0, " hello", 2.5)) == [(0.0, 2.5, " hello")]
+    assert split(decoded(" hello"), duration=4.2) == [(0.0, 4.2, " hello")]
+
+def test_split_segments_keeps_single_timestamp_ending():
+    r = decoded(0.0, " one", 1.0, 1.0, " two", 2.5, 2.5, " three", 4.0)
+    assert split(r) == [(0.0, 1.0, " one"), (1.0, 2.5, " two"), (2.5, 4.0, " three")]
+    assert not app._needs_fallback(r, tokenizer().timestamp_begin)
+
+def test_unfinished_tail_falls_back_to_transcribe():
+    # 最後一對時間戳之後的 " world" 沒有結束時間，拆段時會遺失，必須逐檔轉錄
+    r = decoded(0.0, " hello", 2.0, 2.0, " world")
+    assert app._needs_fallback(r, tokenizer().timestamp_begin)
+    assert not app._needs_fallback(decoded(0.0, " hello", 2.0, 2.0), tokenizer().timestamp_begin)
+    assert app._needs_fallback(decoded(0.0, " hello", 2.0, avg_logprob=-1.5), tokenizer().timestamp_begin)
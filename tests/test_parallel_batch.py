@@ -0,0 +1,79 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from bench_rtf import load_app
+from job_ledger import DONE, FAILED, JobLedger
+
+app = load_app()
+
+class FlakyPool:
+    # 第一個 worker 池：第一個工作的 worker 異常結束，之後送出都丟 BrokenProcessPool；重建後的池正常執行
+    created = []
+
+    def __init__(self, *args, **kwargs):
+        FlakyPool.created.append(self)
+        self.broken = len(FlakyPool.created) == 1
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        fut = Future()
+        if self.broken and self.submitted:
+            raise BrokenProcessPool("A child process terminated abruptly")
+        self.submitted += 1
+        if self.broken:
+            fut.set_exception(BrokenProcessPool("A process in the process pool was terminated abruptly"))
+        else:
+            fut.set_result(fn(*args))
+        return fut
+
+    def shutdown(self, wait=True):
+        pass
+
+def test_broken_pool_fails_inflight_files_and_restarts(tmp_path, monkeypatch):
+    FlakyPool.created.clear()
+    monkeypatch.setattr(app, "ProcessPoolExecutor", FlakyPool)
+    monkeypatch.setattr(app, "_worker_transcribe", lambda path, audio=None: f"{path}.zip")
+    paths = [tmp_path / f"{i}.wav" for i in range(4)]
+    ledger = JobLedger(tmp_path / "jobs.sqlite", "base")
+    ledger.register(paths)
+    failed = app.run_parallel_batch(paths, "Chinese", "base", "cpu", 2, ledger=ledger)
+    assert failed == paths[:1]
+    assert len(FlakyPool.created) == 2
+    states = ledger.states()
+    assert states[str(paths[0].resolve())] == FAILED
+    assert all(states[str(p.resolve())] == DONE for p in paths[1:])
+    ledger.close()
+
+class InlinePool:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def submit(self, fn, *args):
+        fut = Future()
+        fut.set_result(fn(*args))
+        return fut
+
+    def shutdown(self, wait=True):
+        pass
+
+def test_chunked_results_do_not_satisfy_whole_file_runs(tmp_path, monkeypatch):
+    import numpy as np
+    from bench_rtf import write_fixture
+    from transcript_cache import TranscriptCache
+    chunk = {"text": "段", "segments": [{"id": 0, "seek": 0, "start": 0.0, "end": 1.0, "text": "段"}], "language": "zh"}
+    whole = {"text": "整檔", "segments": [], "language": "zh"}
+    calls = []
+    monkeypatch.setattr(app, "ProcessPoolExecutor", InlinePool)
+    monkeypatch.setattr(app, "load_audio", lambda path: 0.1 * np.random.default_rng(0).standard_normal(60 * 16000).astype(np.float32))
+    monkeypatch.setattr(app, "_worker_transcribe_chunk", lambda audio, path: chunk)
+    monkeypatch.setattr(app, "save_outputs", lambda result, path, parent, model_choice: f"{path}.zip")
+    monkeypatch.setattr(app, "check_duration", lambda path, audio=None: None)
+    monkeypatch.setattr(app, "run_model", lambda *args: calls.append(args) or whole)
+    p = write_fixture(tmp_path / "long.wav", 1)
+    cache = TranscriptCache(tmp_path / "cache")
+    assert app.run_parallel_batch([p], "Chinese", "base", "cpu", 2, chunk_sec=20, cache=cache) == []
+    # 不切段的轉錄不會拿到切段接回的結果，反之亦然
+    app.transcribe_file(str(p), "Chinese", None, tmp_path, "base", cache=cache)
+    assert len(calls) == 1
+    assert app.cache_lookup(cache, str(p), "base", "Chinese", chunk=20)[1]["text"] == "段"
+    assert app.cache_lookup(cache, str(p), "base", "Chinese")[1] == whole
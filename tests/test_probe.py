@@ -0,0 +1,57 @@
+import json
+import struct
+
+import probe
+from probe import DURATION_CACHE_NAME, probe_duration, probe_durations
+
+# MPEG-1 Layer III，128 kbps，44.1 kHz，立體聲，無 padding：每個 frame 417 bytes、1152 個取樣
+MP3_HEADER = b"\xff\xfb\x90\x04"
+MP3_FRAME = MP3_HEADER + b"\x00" * 413
+
+def write_wav(path, seconds, rate=16000):
+    import numpy as np
+    import soundfile as sf
+    sf.write(str(path), np.zeros(int(seconds * rate), dtype=np.float32), rate)
+    return path
+
+def box(kind, body):
+    return struct.pack(">I4s", 8 + len(body), kind) + body
+
+def test_wav_duration(tmp_path):
+    assert abs(probe_duration(write_wav(tmp_path / "a.wav", 2.5)) - 2.5) < 1e-6
+
+def test_cbr_mp3_with_id3(tmp_path):
+    path = tmp_path / "cbr.mp3"
+    id3 = b"ID3\x03\x00\x00\x00\x00\x00\x0a" + b"\x00" * 10
+    path.write_bytes(id3 + MP3_FRAME * 100 + b"TAG" + b"\x00" * 125)
+    assert abs(probe_duration(path) - 417 * 100 * 8 / 128000) < 1e-6
+
+def test_vbr_mp3_uses_xing_frame_count(tmp_path):
+    path = tmp_path / "vbr.mp3"
+    xing = MP3_HEADER + b"\x00" * 32 + b"Xing" + struct.pack(">II", 1, 500)
+    path.write_bytes(xing + b"\x00" * (417 - len(xing)) + MP3_FRAME * 10)
+    assert abs(probe_duration(path) - 500 * 1152 / 44100) < 1e-6
+
+def test_mp4_reads_mvhd_after_mdat(tmp_path):
+    path = tmp_path / "a.m4a"
+    mvhd = box(b"mvhd", struct.pack(">IIIII", 0, 0, 0, 1000, 93500) + b"\x00" * 80)
+    path.write_bytes(box(b"ftyp", b"M4A \x00\x00\x00\x00") + box(b"mdat", b"\x00" * 4096) + box(b"moov", mvhd))
+    assert probe_duration(path) == 93.5
+
+def test_unreadable_file_returns_none(tmp_path):
+    path = tmp_path / "broken.mp4"
+    path.write_bytes(b"not a media file")
+    assert probe_duration(path) is None
+    assert probe_duration(tmp_path / "missing.wav") is None
+
+def test_durations_are_cached_on_disk(tmp_path, monkeypatch):
+    files = [write_wav(tmp_path / f"{i}.wav", i + 1) for i in range(3)]
+    cache_dir = tmp_path / "cache"
+    durations = probe_durations(files, cache_dir=cache_dir)
+    assert [round(durations[f], 3) for f in files] == [1.0, 2.0, 3.0]
+    assert len(json.loads((cache_dir / DURATION_CACHE_NAME).read_text(encoding="utf-8"))) >= 3
+
+    # 新行程：記憶體快取清空後仍由磁碟快取取得，不重新解析
+    monkeypatch.setattr(probe, "_memo", {})
+    monkeypatch.setattr(probe, "_probe_uncached", lambda path: 1 / 0)
+    assert probe_durations(files, cache_dir=cache_dir) == durations
@@ -0,0 +1,51 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("whisper")
+
+from bench_rtf import load_model
+from quantize import load_quantized, quantize_linear, quantized_path
+
+def tiny_loader(model_choice, device):
+    return load_model(model_choice, device, "tiny")
+
+def test_linear_layers_are_quantized_and_output_is_close():
+    import whisper
+    fp32 = tiny_loader("base", "cpu")
+    int8 = quantize_linear(tiny_loader("base", "cpu"))
+    kinds = {type(m).__module__ for m in int8.modules()}
+    assert "torch.ao.nn.quantized.dynamic.modules.linear" in kinds
+    assert not any(type(m) is torch.nn.Linear for m in int8.modules())
+
+    mel = torch.randn(1, 80, 3000)
+    with torch.inference_mode():
+        ref, out = fp32.encoder(mel), int8.encoder(mel)
+    assert ((ref - out).abs().mean() / ref.abs().mean()) < 0.1
+    assert isinstance(int8, whisper.model.Whisper)
+
+def test_quantized_model_is_cached(tmp_path):
+    calls = []
+
+    def loader(model_choice, device):
+        calls.append(model_choice)
+        return tiny_loader(model_choice, device)
+
+    model, cached = load_quantized("base", tmp_path, loader)
+    assert not cached and quantized_path("base", tmp_path).exists()
+    again, cached = load_quantized("base", tmp_path, loader)
+    assert cached and calls == ["base"]
+
+    mel = torch.randn(1, 80, 3000)
+    with torch.inference_mode():
+        assert torch.equal(model.encoder(mel), again.encoder(mel))
+
+def test_worker_stores_quantized_model_in_cache_dir(tmp_path, monkeypatch):
+    import whisper
+    from bench_rtf import load_app
+    app = load_app()
+    monkeypatch.setattr(whisper, "load_model", tiny_loader)
+    monkeypatch.setattr(app, "apply_threads", lambda config: None)
+    app._init_worker("base", "cpu", "Chinese", {}, quantize=True, cache_dir=tmp_path)
+    assert quantized_path("base", tmp_path).exists()
+    app._init_worker("base", "cpu", "Chinese", {}, quantize=True, cache_dir=tmp_path / "other")
+    assert quantized_path("base", tmp_path / "other").exists()
@@ -0,0 +1,97 @@
+# render_outputs 必須與舊版逐格式組字串的輸出逐位元組相同
+import json
+import random
+from datetime import timedelta
+
+import pytest
+
+from render import format_timestamp, format_timestamps, render_outputs
+
+def legacy_format_timestamp(seconds, for_vtt=False):
+    td = timedelta(seconds=seconds)
+    ts = str(td)
+    if "." not in ts:
+        ts += ".000"
+    else:
+        ts = ts[:-3]
+    return ts if for_vtt else ts.replace(".", ",")
+
+def legacy_outputs(result, title, convert):
+    # v1.7 save_outputs 的組字串邏輯（不含寫檔）
+    srt_content = ""
+    for i, seg in enumerate(result["segments"], start=1):
+        srt_content += f"{i}\n{legacy_format_timestamp(seg['start'])} --> {legacy_format_timestamp(seg['end'])}\n{convert(seg['text'])}\n\n"
+
+    txt_content = "\n\n".join(convert(seg["text"]) for seg in result["segments"] if seg["text"].strip())
+
+    md_lines = [f"# 語音筆記：{title}\n"]
+    for seg in result["segments"]:
+        start = legacy_format_timestamp(seg["start"])
+        end = legacy_format_timestamp(seg["end"])
+        text = convert(seg["text"])
+        if text:
+            md_lines.append(f"## [{start} – {end}]\n{text}\n")
+
+    result_converted = {
+        key: [
+            {k: (convert(v) if k == "text" else v) for k, v in seg.items()}
+            for seg in val
+        ] if key == "segments" else val
+        for key, val in result.items()
+    }
+    segments_only = {"segments": [{"start": seg["start"], "end": seg["end"], "text": convert(seg["text"])} for seg in result["segments"]]}
+
+    vtt_content = "WEBVTT\n\n"
+    for seg in result["segments"]:
+        start = legacy_format_timestamp(seg["start"], for_vtt=True)
+        end = legacy_format_timestamp(seg["end"], for_vtt=True)
+        vtt_content += f"{start} --> {end}\n{convert(seg['text'])}\n\n"
+
+    return [
+        (".srt", srt_content),
+        (".txt", txt_content),
+        (".md", "\n".join(md_lines)),
+        (".json", json.dumps(result_converted, ensure_ascii=False, indent=2)),
+        ("_segments_only.json", json.dumps(segments_only, ensure_ascii=False, indent=2)),
+        (".vtt", vtt_content),
+    ]
+
+EDGE_SECONDS = [0, 0.0, 0.0005, 0.0015, 0.001, 0.999, 0.9995, 0.9999995, 1.0, 59.9999, 59.9995, 60.0,
+                3599.9995, 3600, 3600.5, 36000.123, 86399.9999, 86400, 90000.25, 123456.789]
+
+def make_result(seed, n=300):
+    rng = random.Random(seed)
+    texts = [" 這是一個測試", " hello world", "", "   ", " 軟體 和 網路", "〇 ok", "\n換行\n", " \"quote\" \\ 🎉"]
+    segs, t = [], 0.0
+    for i in range(n):
+        d = rng.choice([0.02, 0.5, 1.34, 2.0, 3.999, 7.26, rng.random() * 30])
+        segs.append({"id": i, "seek": 0, "start": round(t, rng.choice([2, 3, 6])), "end": round(t + d, 2),
+                     "text": rng.choice(texts), "tokens": [1, 2], "temperature": 0.0,
+                     "avg_logprob": -0.3, "compression_ratio": 1.2, "no_speech_prob": 0.01})
+        t += d + rng.choice([0, 0.3, 100, 3600])
+    for i, s in enumerate(EDGE_SECONDS):
+        segs.append({"id": n + i, "seek": 0, "start": s, "end": s + 0.0005, "text": " edge"})
+    return {"text": "".join(s["text"] for s in segs), "segments": segs, "language": "zh"}
+
+@pytest.mark.parametrize("seed", range(5))
+def test_render_outputs_byte_identical(seed):
+    result = make_result(seed)
+    texts = [seg["text"].strip() for seg in result["segments"]]
+    new = render_outputs(result, texts, "錄音 01")
+    old = legacy_outputs(result, "錄音 01", str.strip)
+    assert [s for s, _ in new] == [s for s, _ in old]
+    for (suffix, a), (_, b) in zip(new, old):
+        assert a.encode("utf-8") == b.encode("utf-8"), suffix
+
+def test_render_outputs_empty():
+    result = {"text": "", "segments": [], "language": "en"}
+    assert render_outputs(result, [], "x") == legacy_outputs(result, "x", str.strip)
+
+def test_format_timestamps_matches_scalar():
+    rng = random.Random(0)
+    values = EDGE_SECONDS + [-1.5, -0.0004] + [rng.random() * 10 ** rng.randint(0, 6) for _ in range(5000)]
+    values += [round(v, 3) for v in values] + [k / 1000 + 0.0005 for k in range(0, 5000)]
+    srt, vtt = format_timestamps(values)
+    assert srt == [legacy_format_timestamp(v) for v in values]
+    assert vtt == [legacy_format_timestamp(v, for_vtt=True) for v in values]
+    assert srt == [format_timestamp(v) for v in values]
@@ -0,0 +1,34 @@
+from pathlib import Path
+
+from scheduler import estimate_durations, makespan_lower_bound, order_paths, simulate_makespan
+
+def make_batch():
+    # 一個 4 小時長檔混在一批短檔中，長檔在檔名順序的最後
+    paths = [Path(f"{i:02d}.mp3") for i in range(25)]
+    durations = {p: 600.0 for p in paths[:24]}
+    durations[paths[24]] = 4 * 3600.0
+    return paths, durations
+
+def test_order_longest_and_shortest():
+    paths, durations = make_batch()
+    assert order_paths(paths, durations, "longest")[0] == paths[24]
+    assert order_paths(paths, durations, "shortest")[-1] == paths[24]
+    # 長度相同時維持原順序
+    assert order_paths(paths, durations, "longest")[1:] == paths[:24]
+
+def test_order_by_name():
+    paths = [Path("b.wav"), Path("A.wav"), Path("c.wav")]
+    assert order_paths(paths, {}, "name") == [Path("A.wav"), Path("b.wav"), Path("c.wav")]
+
+def test_unknown_duration_uses_average():
+    paths = [Path("a"), Path("b"), Path("c")]
+    assert estimate_durations(paths, {paths[0]: 10.0, paths[1]: 30.0, paths[2]: None})[paths[2]] == 20.0
+    assert estimate_durations(paths, None) == {p: 1.0 for p in paths}
+
+def test_longest_first_reaches_lower_bound():
+    paths, durations = make_batch()
+    bound = makespan_lower_bound(paths, durations, 4)
+    assert bound == 4 * 3600  # 不會短於最長的單一檔案
+    # 檔名順序：長檔最後才開始，其他 worker 閒置
+    assert simulate_makespan(paths, durations, 4) / bound > 1.2
+    assert simulate_makespan(order_paths(paths, durations, "longest"), durations, 4) / bound == 1.0
@@ -0,0 +1,10 @@
+# 啟動回歸測試：不需推論的路徑不可載入重量級套件（耗時另以 benchmarks/bench_startup.py 量測，不在測試中比對牆鐘時間）
+import pytest
+
+from bench_startup import run_once, scenarios
+
+@pytest.mark.parametrize("name", ["help", "missing-path", "overwrite-cancel"])
+def test_cli_paths_skip_heavy_imports(name, tmp_path):
+    args, stdin = scenarios(tmp_path)[name]
+    _, heavy = run_once(args, stdin)
+    assert heavy == []
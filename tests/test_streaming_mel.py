@@ -0,0 +1,64 @@
+import shutil
+
+import pytest
+
+torch = pytest.importorskip("torch")
+whisper = pytest.importorskip("whisper")
+
+import streaming_mel
+from audio_decode import load_audio, stream_pcm
+from bench_rtf import load_model, synth_audio
+from streaming_mel import StreamingMel
+
+@pytest.fixture
+def memory_source(monkeypatch):
+    # 不經 ffmpeg：以記憶體中的音訊代替串流解碼，區段長度可調
+    sources = {}
+
+    def fake_stream(file, block_samples, sr=16000, threads=None):
+        audio = sources[file]
+        for i in range(0, len(audio), block_samples):
+            yield audio[i:i + block_samples]
+
+    monkeypatch.setattr(streaming_mel, "stream_pcm", fake_stream)
+    return sources
+
+@pytest.mark.parametrize("samples", [150, 201, 16037, 16000 * 45])
+def test_windows_match_full_log_mel(memory_source, samples):
+    audio = synth_audio(samples / 16000 + 1, seed=samples)[:samples]
+    memory_source["a.wav"] = audio
+    full = whisper.log_mel_spectrogram(audio, 80, padding=whisper.audio.N_SAMPLES)
+    with StreamingMel("a.wav", 80, block_sec=7.3) as mel:
+        assert mel.shape == tuple(full.shape)
+        seek = 0
+        for step in (3000, 1234, 5, 3000, 2999, 3000):
+            assert torch.equal(mel[:, seek:seek + 3000], full[:, seek:seek + 3000])
+            seek = min(seek + step, mel.n_frames)
+        # 往回讀時重新從頭解碼
+        assert torch.equal(mel[:, 100:200], full[:, 100:200])
+
+def test_transcribe_matches_full_decode(memory_source):
+    model = load_model("base", "cpu", "tiny")
+    audio = synth_audio(40)
+    memory_source["a.wav"] = audio
+
+    def transcribe(audio):
+        # 隨機權重的輸出會觸發溫度退回（抽樣），只用 temperature=0；language=None 時先取前 30 秒偵測語言
+        return model.transcribe(audio, language=None, verbose=None, fp16=False, temperature=0.0)
+
+    expected = transcribe(audio)
+    with StreamingMel("a.wav", model.dims.n_mels) as mel:
+        assert transcribe(mel) == expected
+    # 一般輸入不受影響
+    assert transcribe(audio) == expected
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="需要 ffmpeg")
+def test_stream_pcm_matches_load_audio(tmp_path):
+    np = pytest.importorskip("numpy")
+    sf = pytest.importorskip("soundfile")
+    sf.write(str(tmp_path / "a.wav"), synth_audio(3), 16000, subtype="PCM_16")
+    blocks = list(stream_pcm(tmp_path / "a.wav", 10000))
+    assert [len(b) for b in blocks] == [10000] * 4 + [8000]
+    assert np.array_equal(np.concatenate(blocks), load_audio(tmp_path / "a.wav"))
+    with pytest.raises(RuntimeError):
+        list(stream_pcm(tmp_path / "missing.wav", 10000))
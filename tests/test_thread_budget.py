@@ -0,0 +1,49 @@
+import shutil
+
+import pytest
+
+import audio_decode
+from audio_decode import ffmpeg_command, load_audio, set_decode_threads
+from thread_budget import auto_workers, plan_threads
+
+def test_laptop_gets_one_worker_and_leaves_a_core_for_decoding():
+    assert auto_workers(cores=4) == 1
+    budget = plan_threads(1, cores=4)
+    assert (budget.workers, budget.intra_op, budget.inter_op, budget.decode_threads) == (1, 3, 1, 1)
+    assert budget.used <= 4
+
+def test_large_box_is_split_into_workers():
+    workers = auto_workers(cores=64)
+    budget = plan_threads(workers, cores=64)
+    assert workers == 7 and budget.intra_op == 8 and budget.decode_threads == 2
+    assert budget.used <= 64
+    # 單一 worker 不會開到 64 執行緒，並提示可改用 --workers auto
+    single = plan_threads(1, cores=64)
+    assert single.intra_op == 16 and "--workers auto" in single.describe()
+
+def test_overrides_and_oversubscription_warning():
+    budget = plan_threads(4, threads=8, interop_threads=2, decode_threads=3, cores=8)
+    assert budget.config() == (8, 2, 3)
+    assert "超過核心數" in budget.describe()
+    assert auto_workers(cores=64, threads=4) == 15
+
+def test_decode_threads_are_passed_to_ffmpeg():
+    assert ffmpeg_command("a.mp3", threads=2)[2:4] == ["-threads", "2"]
+    try:
+        set_decode_threads(1)
+        assert ffmpeg_command("a.mp3")[3] == "1"
+    finally:
+        set_decode_threads(0)
+    assert audio_decode._decode_threads == 0
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="需要 ffmpeg")
+def test_load_audio_decodes_wav(tmp_path):
+    np = pytest.importorskip("numpy")
+    sf = pytest.importorskip("soundfile")
+    samples = (0.1 * np.sin(np.arange(16000) / 10)).astype(np.float32)
+    sf.write(str(tmp_path / "a.wav"), samples, 16000, subtype="PCM_16")
+    audio = load_audio(tmp_path / "a.wav", threads=1)
+    assert audio.dtype == np.float32 and len(audio) == 16000
+    assert np.abs(audio - samples).max() < 1e-3
+    with pytest.raises(RuntimeError):
+        load_audio(tmp_path / "missing.wav")
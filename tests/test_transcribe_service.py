@@ -0,0 +1,41 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from transcribe_service import ModelLRU, make_handler, service_available, submit_job
+
+def test_model_lru_evicts_least_recently_used():
+    loads = []
+    models = ModelLRU(lambda name: loads.append(name) or f"model-{name}", max_models=2)
+    assert models.get("base") == "model-base"
+    models.get("medium")
+    models.get("base")
+    models.get("large-v2")
+    assert models.names() == ["base", "large-v2"]
+    models.get("base")
+    assert loads == ["base", "medium", "large-v2"]
+
+@pytest.fixture
+def server():
+    models = ModelLRU(lambda name: name)
+
+    def handle_job(job):
+        if job["input_path"] == "bad":
+            raise ValueError("boom")
+        return {"zip": job["input_path"] + ".zip", "model": models.get(job["model"])}
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(handle_job, models))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_submit_job_roundtrip(server):
+    assert service_available(server)
+    assert submit_job(server, {"input_path": "a.wav", "model": "base"}) == {"zip": "a.wav.zip", "model": "base"}
+    with pytest.raises(RuntimeError, match="boom"):
+        submit_job(server, {"input_path": "bad", "model": "base"})
+
+def test_service_unavailable():
+    assert not service_available("http://127.0.0.1:9", timeout=0.2)
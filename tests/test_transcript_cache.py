@@ -0,0 +1,46 @@
+import os
+
+from bench_rtf import load_app, write_fixture
+from transcript_cache import TranscriptCache
+
+app = load_app()
+
+def test_inference_variants_get_separate_keys(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "resolve_precision", lambda precision: "bf16")
+    cache = TranscriptCache(tmp_path / "cache")
+    audio = str(write_fixture(tmp_path / "a.wav", 1))
+    keys = []
+    for variant in [{}, {"quantize": True}, {"engine": "onnx"}, {"cpu_opt": {"precision": "auto"}}]:
+        app.set_cache_options("cpu", **variant)
+        keys.append(app.cache_lookup(cache, audio, "base", "Chinese")[0])
+    assert len(set(keys)) == 4
+    # 預設的 torch fp32 沿用原本的鍵；GPU 不量化
+    assert keys[0] == cache.key(audio, "base", "Chinese", vad=False)
+    app.set_cache_options("cuda", quantize=True)
+    assert app.cache_lookup(cache, audio, "base", "Chinese")[0] == keys[0]
+    app.set_cache_options("cpu")
+
+def test_key_follows_content_and_options(tmp_path):
+    cache = TranscriptCache(tmp_path / "cache")
+    a = write_fixture(tmp_path / "a.wav", 1)
+    copy = tmp_path / "copy.wav"
+    copy.write_bytes(a.read_bytes())
+    key = cache.key(a, "base", "Chinese", vad=False)
+    # 內容相同即命中，與路徑無關
+    assert cache.key(copy, "base", "Chinese", vad=False) == key
+    assert len({key, cache.key(a, "medium", "Chinese", vad=False), cache.key(a, "base", "English", vad=False),
+                cache.key(a, "base", "Chinese", vad=True)}) == 4
+    copy.write_bytes(a.read_bytes() + b"\0")
+    assert cache.key(copy, "base", "Chinese", vad=False) != key
+
+def test_evicts_least_recently_used(tmp_path):
+    result = {"text": "x" * 1000, "segments": []}
+    cache = TranscriptCache(tmp_path / "cache", max_mb=2500 / 1024 / 1024)
+    keys = [f"{i:02d}" + "0" * 62 for i in range(3)]
+    for i, key in enumerate(keys[:2]):
+        cache.put(key, result)
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+    assert cache.get(keys[0]) == result  # 讀取後變成最近使用
+    cache.put(keys[2], result)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == result and cache.get(keys[2]) == result
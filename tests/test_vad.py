@@ -0,0 +1,47 @@
+import numpy as np
+
+from vad import SAMPLE_RATE, detect_speech, group_regions, speech_clip_timestamps
+
+def voice(seconds, amplitude=0.1):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    f0 = 140 + 40 * np.sin(2 * np.pi * 0.3 * t)
+    tone = sum(np.sin(2 * np.pi * k * np.cumsum(f0) / SAMPLE_RATE) / k for k in range(1, 6))
+    return amplitude * tone * (0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2)
+
+def noise(seconds, level=0.003, seed=0):
+    return level * np.random.default_rng(seed).standard_normal(int(seconds * SAMPLE_RATE))
+
+def test_pure_noise_has_no_speech():
+    assert detect_speech(noise(60).astype(np.float32)) == []
+
+def test_continuous_speech_is_kept():
+    # 沒有停頓：底噪估計就是語音本身，仍須整段保留
+    for amplitude in (0.3, 0.1, 0.02):
+        audio = (voice(120, amplitude) + noise(120)).astype(np.float32)
+        speech = detect_speech(audio)
+        assert len(speech) == 1
+        assert speech[0][0] == 0.0 and speech[0][1] >= 119.5
+
+def test_speech_with_pauses():
+    # 4 秒語音、5 秒靜音交替
+    pattern = np.concatenate([voice(4), np.zeros(5 * SAMPLE_RATE)])
+    audio = (np.tile(pattern, 6) + noise(54)).astype(np.float32)
+    speech = detect_speech(audio)
+    assert len(speech) == 6
+    for i, (start, end) in enumerate(speech):
+        assert abs(start - (i * 9 - 0.3)) < 0.2 or (i == 0 and start == 0.0)
+        assert abs(end - (i * 9 + 4.3)) < 0.2
+
+def test_regions_are_grouped_into_30_second_clips():
+    # 600 秒、每 15 秒停頓 2.5 秒：40 個語音區段，合併後不超過不用 VAD 時的 20 個 30 秒視窗
+    pattern = np.concatenate([voice(12.5), np.zeros(int(2.5 * SAMPLE_RATE))])
+    audio = (np.tile(pattern, 40) + noise(600)).astype(np.float32)
+    assert len(detect_speech(audio)) == 40
+    clips = speech_clip_timestamps(audio)
+    spans = list(zip(clips[0::2], clips[1::2]))
+    assert len(spans) <= 20
+    assert all(end - start <= 30.0 for start, end in spans)
+    assert spans[0][0] == 0.0 and spans[-1][1] >= 597.5
+
+def test_group_regions_keeps_long_gaps_and_long_regions_apart():
+    assert group_regions([(0, 5), (10, 20), (40, 45), (50, 120)]) == [(0, 20), (40, 45), (50, 120)]